@@ -0,0 +1,336 @@
+"""
+Reduced ordered binary decision diagrams for logic.py sentences
+
+A BDD compiles a sentence once into a DAG of decisions on its symbols, in
+a fixed order. After that, entailment, model counting and the symbols the
+sentence forces true or false are all answered in time linear in the size
+of the diagram, without enumerating models. A BDD can be saved to a file
+and loaded again, so puzzles can be compiled offline.
+
+Nodes are integers: 0 is the false terminal, 1 the true terminal, and any
+other node n stands for (level, low, high) in BDD.nodes, meaning "if the
+symbol at `level` is true then `high` else `low`".
+"""
+
+import json
+
+from logic import (And, Biconditional, CompiledSentence, Implication, Not,
+                   Or, Symbol)
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD():
+    """
+    Shared node store for diagrams over one symbol order.
+
+    Every node is unique (no two nodes with the same level and children)
+    and no node has equal children, so two sentences are equivalent exactly
+    when they compile to the same node.
+    """
+
+    def __init__(self, order):
+        self.order = list(order)
+        self.levels = {name: i for i, name in enumerate(self.order)}
+
+        # nodes[n] is (level, low, high); the terminals sit below every level
+        terminal = len(self.order)
+        self.nodes = [(terminal, None, None), (terminal, None, None)]
+        self.unique = dict()
+        self.cache = dict()
+
+    def node(self, level, low, high):
+        """
+        Returns the node for "if order[level] then high else low".
+        """
+        if low == high:
+            return low
+        key = (level, low, high)
+        n = self.unique.get(key)
+        if n is None:
+            n = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = n
+        return n
+
+    def variable(self, name):
+        """
+        Returns the node of the symbol called `name`.
+        """
+        if name not in self.levels:
+            raise Exception(f"variable {name} not in the symbol order")
+        return self.node(self.levels[name], FALSE, TRUE)
+
+    def apply(self, op, a, b):
+        """
+        Returns the node for `op` ("and", "or", "xor", "implies" or "iff")
+        applied to the nodes `a` and `b`.
+        """
+        # Terminal cases
+        if op == "and":
+            if a == FALSE or b == FALSE:
+                return FALSE
+            if a == TRUE:
+                return b
+            if b == TRUE or a == b:
+                return a
+        elif op == "or":
+            if a == TRUE or b == TRUE:
+                return TRUE
+            if a == FALSE:
+                return b
+            if b == FALSE or a == b:
+                return a
+        elif op == "xor":
+            if a == b:
+                return FALSE
+            if a == FALSE:
+                return b
+            if b == FALSE:
+                return a
+        elif op == "iff":
+            if a == b:
+                return TRUE
+            if a == TRUE:
+                return b
+            if b == TRUE:
+                return a
+        elif op == "implies":
+            if a == FALSE or b == TRUE or a == b:
+                return TRUE
+            if a == TRUE:
+                return b
+        if a <= TRUE and b <= TRUE:
+            return OPERATORS[op](a, b)
+
+        key = (op, a, b)
+        if key in self.cache:
+            return self.cache[key]
+
+        # Shannon expansion on the topmost symbol of the two
+        level_a, low_a, high_a = self.nodes[a]
+        level_b, low_b, high_b = self.nodes[b]
+        level = min(level_a, level_b)
+        if level_a != level:
+            low_a = high_a = a
+        if level_b != level:
+            low_b = high_b = b
+        result = self.node(level,
+                           self.apply(op, low_a, low_b),
+                           self.apply(op, high_a, high_b))
+        self.cache[key] = result
+        return result
+
+    def negate(self, a):
+        return self.apply("xor", a, TRUE)
+
+    def compile(self, sentence):
+        """
+        Returns the node of a logic.py sentence (or CompiledSentence).
+        """
+        if isinstance(sentence, CompiledSentence):
+            sentence = sentence.sentence
+        memo = dict()
+
+        def build(s):
+            if s in memo:
+                return memo[s]
+            if isinstance(s, Symbol):
+                n = self.variable(s.name)
+            elif isinstance(s, Not):
+                n = self.negate(build(s.operand))
+            elif isinstance(s, And):
+                n = TRUE
+                for conjunct in s.conjuncts:
+                    n = self.apply("and", n, build(conjunct))
+            elif isinstance(s, Or):
+                n = FALSE
+                for disjunct in s.disjuncts:
+                    n = self.apply("or", n, build(disjunct))
+            elif isinstance(s, Implication):
+                n = self.apply("implies", build(s.antecedent),
+                               build(s.consequent))
+            elif isinstance(s, Biconditional):
+                n = self.apply("iff", build(s.left), build(s.right))
+            else:
+                raise TypeError("must be a logical sentence")
+            memo[s] = n
+            return n
+
+        return build(sentence)
+
+    def size(self, root):
+        """
+        Returns the number of nodes reachable from `root`.
+        """
+        seen = set()
+        stack = [root]
+        while stack:
+            n = stack.pop()
+            if n in seen:
+                continue
+            seen.add(n)
+            if n > TRUE:
+                stack.extend(self.nodes[n][1:])
+        return len(seen)
+
+    def entails(self, knowledge, query):
+        """
+        Checks if the node `knowledge` entails the node `query`.
+        """
+        return self.apply("implies", knowledge, query) == TRUE
+
+    def count(self, root):
+        """
+        Returns the number of models of `root` over all symbols in the order.
+        """
+        memo = {FALSE: 0, TRUE: 1}
+
+        def models(n):
+            # Models over the symbols from this node's level down
+            if n not in memo:
+                level, low, high = self.nodes[n]
+                memo[n] = (models(low) << (self.nodes[low][0] - level - 1)) + (
+                    models(high) << (self.nodes[high][0] - level - 1))
+            return memo[n]
+
+        return models(root) << self.nodes[root][0]
+
+    def forced(self, root):
+        """
+        Returns (true, false): the sets of symbols that are true in every
+        model of `root` and false in every model of `root`. Both are empty
+        if `root` has no models.
+        """
+        if root == FALSE:
+            return set(), set()
+
+        # Only nodes on some path to TRUE matter; a symbol is forced if
+        # every such path goes through it and always takes the same branch
+        reachable = set()
+        stack = [root]
+        while stack:
+            n = stack.pop()
+            if n in reachable or n <= TRUE:
+                continue
+            reachable.add(n)
+            stack.extend(self.nodes[n][1:])
+
+        # A symbol skipped on some path to TRUE is free on that path
+        skipped = set()
+        branches = dict()
+        for n in reachable:
+            level, low, high = self.nodes[n]
+            for child, value in ((low, False), (high, True)):
+                if child == FALSE:
+                    continue
+                branches.setdefault(level, set()).add(value)
+                skipped.update(range(level + 1, self.nodes[child][0]))
+        skipped.update(range(self.nodes[root][0]))
+
+        true, false = set(), set()
+        for level, values in branches.items():
+            if level in skipped or len(values) != 1:
+                continue
+            (true if values == {True} else false).add(self.order[level])
+        return true, false
+
+    def save(self, path, roots):
+        """
+        Writes the nodes reachable from the named `roots` (a dict from name
+        to node) to `path`.
+        """
+        keep = dict()
+        order = []
+        for root in roots.values():
+            stack = [root]
+            while stack:
+                n = stack[-1]
+                if n in keep or n <= TRUE:
+                    stack.pop()
+                    continue
+                _, low, high = self.nodes[n]
+                pending = [c for c in (low, high) if c > TRUE and c not in keep]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                keep[n] = len(order) + 2
+                order.append(n)
+
+        def renumber(n):
+            return n if n <= TRUE else keep[n]
+
+        with open(path, "w") as f:
+            json.dump({
+                "order": self.order,
+                "nodes": [[self.nodes[n][0], renumber(self.nodes[n][1]),
+                           renumber(self.nodes[n][2])] for n in order],
+                "roots": {name: renumber(n) for name, n in roots.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a file written by save(). Returns (bdd, roots).
+        """
+        with open(path) as f:
+            data = json.load(f)
+        bdd = cls(data["order"])
+        for level, low, high in data["nodes"]:
+            bdd.node(level, low, high)
+        return bdd, data["roots"]
+
+
+OPERATORS = {
+    "and": lambda a, b: a & b,
+    "or": lambda a, b: a | b,
+    "xor": lambda a, b: a ^ b,
+    "iff": lambda a, b: 1 - (a ^ b),
+    "implies": lambda a, b: (1 - a) | b,
+}
+
+
+class CompiledKnowledge():
+    """
+    A knowledge base compiled to a BDD, answering queries about it.
+    """
+
+    def __init__(self, knowledge, order=None, bdd=None):
+        if isinstance(knowledge, CompiledSentence):
+            knowledge = knowledge.sentence
+        if bdd is None:
+            bdd = BDD(order or sorted(knowledge.symbols()))
+        self.bdd = bdd
+        self.root = bdd.compile(knowledge) if knowledge is not None else None
+
+    def ask(self, query):
+        """
+        Checks if the knowledge base entails `query`, a sentence over
+        symbols in the BDD's order.
+        """
+        return self.bdd.entails(self.root, self.bdd.compile(query))
+
+    def count(self):
+        """
+        Returns the number of models of the knowledge base.
+        """
+        return self.bdd.count(self.root)
+
+    def forced(self):
+        """
+        Returns (true, false) sets of symbol names that every model of the
+        knowledge base makes true, respectively false.
+        """
+        return self.bdd.forced(self.root)
+
+    def save(self, path):
+        self.bdd.save(path, {"knowledge": self.root})
+
+    @classmethod
+    def load(cls, path):
+        bdd, roots = BDD.load(path)
+        compiled = cls(None, bdd=bdd)
+        compiled.root = roots["knowledge"]
+        return compiled
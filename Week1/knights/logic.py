@@ -1,19 +1,120 @@
+import functools
 import itertools
+import multiprocessing
+import operator
+import os
+import weakref
+
+from sat import Solver
 
 
 class Sentence():
+    """
+    Immutable, hash-consed logical sentence.
+
+    Sentences are interned: building a sentence that is structurally
+    identical to a live one returns that same object. Equality is therefore
+    identity, and the hash, the symbol set and the depth are computed once,
+    when a sentence is first built.
+    """
+
+    __slots__ = ("_hash", "_symbols", "depth", "__weakref__")
+
+    # Every live sentence, keyed by its structure
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, key, children, symbols=None, **fields):
+        """
+        Returns the live sentence with structure `key`, or makes a new one
+        of this class with attributes `fields`. `children` are its direct
+        subsentences; `symbols` is its symbol set if it has no children.
+        """
+        sentence = Sentence.interned.get(key)
+        if sentence is not None:
+            return sentence
+
+        sentence = object.__new__(cls)
+        for name, value in fields.items():
+            object.__setattr__(sentence, name, value)
+        if symbols is None:
+            symbols = frozenset().union(*(child._symbols for child in children))
+        object.__setattr__(sentence, "_hash", hash(key))
+        object.__setattr__(sentence, "_symbols", symbols)
+        object.__setattr__(sentence, "depth", 1 + max(
+            (child.depth for child in children), default=-1
+        ))
+        Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Unpickling and copying go through the constructor, so they intern
+        return (type(self), self.arguments())
+
+    def arguments(self):
+        """Returns the constructor arguments that rebuild the sentence."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_columns(self, columns):
+        """
+        Evaluates the logical sentence on many models at once. `columns`
+        maps each symbol name to a NumPy boolean array (or np.bool_) with
+        one entry per model.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
+    def tseitin(self, cnf):
+        """
+        Adds Tseitin definitions for the sentence to `cnf` and returns a
+        literal that is true exactly when the sentence is.
+        """
+        raise Exception("nothing to encode")
+
+    def to_cnf(self, cnf=None):
+        """
+        Returns a CNF, linear in the size of the sentence, that is
+        satisfiable exactly when the sentence is. Adds to `cnf` if given.
+        """
+        if cnf is None:
+            cnf = CNF()
+        cnf.add(self)
+        return cnf
+
+    def source(self, atom):
+        """
+        Returns a Python expression for the sentence, where `atom(name)`
+        gives the expression for the symbol called `name`.
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols=None):
+        """
+        Returns a CompiledSentence: the sentence as flat Python functions
+        of assignments indexed by symbol ID. `symbols` lists the symbol
+        names in ID order (sorted by default) and may include extra names.
+        """
+        return CompiledSentence(self, symbols)
+
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +144,13 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.intern(("symbol", name), (), frozenset([name]), name=name)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def arguments(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,23 +161,31 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_columns(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def tseitin(self, cnf):
+        return cnf.variable(self.name)
+
+    def source(self, atom):
+        return atom(self.name)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern(("not", operand), (operand,), operand=operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def arguments(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +193,29 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_columns(self, columns):
+        return ~self.operand.evaluate_columns(columns)
+
+    def tseitin(self, cnf):
+        return -cnf.literal(self.operand)
+
+    def source(self, atom):
+        return f"(not {self.operand.source(atom)})"
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return cls.intern(("and",) + conjuncts, conjuncts, conjuncts=conjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def arguments(self):
+        return self.conjuncts
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +224,52 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """Returns a new conjunction with `conjunct` added at the end."""
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_columns(self, columns):
+        if not self.conjuncts:
+            import numpy as np
+            return np.True_
+        return functools.reduce(operator.and_, (
+            conjunct.evaluate_columns(columns) for conjunct in self.conjuncts
+        ))
+
+    def tseitin(self, cnf):
+        lits = [cnf.literal(conjunct) for conjunct in self.conjuncts]
+        v = cnf.new_variable()
+        for lit in lits:
+            cnf.clauses.append([-v, lit])
+        cnf.clauses.append([v] + [-lit for lit in lits])
+        return v
+
+    def source(self, atom):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.source(atom) for conjunct in self.conjuncts
+        ) + ")"
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.intern(("or",) + disjuncts, disjuncts, disjuncts=disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def arguments(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +278,48 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_columns(self, columns):
+        if not self.disjuncts:
+            import numpy as np
+            return np.False_
+        return functools.reduce(operator.or_, (
+            disjunct.evaluate_columns(columns) for disjunct in self.disjuncts
+        ))
+
+    def tseitin(self, cnf):
+        lits = [cnf.literal(disjunct) for disjunct in self.disjuncts]
+        v = cnf.new_variable()
+        for lit in lits:
+            cnf.clauses.append([v, -lit])
+        cnf.clauses.append([-v] + lits)
+        return v
+
+    def source(self, atom):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.source(atom) for disjunct in self.disjuncts
+        ) + ")"
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern(("implies", antecedent, consequent),
+                          (antecedent, consequent),
+                          antecedent=antecedent, consequent=consequent)
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def arguments(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +328,38 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_columns(self, columns):
+        return (~self.antecedent.evaluate_columns(columns)
+                | self.consequent.evaluate_columns(columns))
+
+    def tseitin(self, cnf):
+        a = cnf.literal(self.antecedent)
+        b = cnf.literal(self.consequent)
+        v = cnf.new_variable()
+        cnf.clauses.extend([[-v, -a, b], [v, a], [v, -b]])
+        return v
+
+    def source(self, atom):
+        return (f"(not {self.antecedent.source(atom)}"
+                f" or {self.consequent.source(atom)})")
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern(("biconditional", left, right), (left, right),
+                          left=left, right=right)
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def arguments(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +370,236 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_columns(self, columns):
+        return (self.left.evaluate_columns(columns)
+                == self.right.evaluate_columns(columns))
+
+    def tseitin(self, cnf):
+        a = cnf.literal(self.left)
+        b = cnf.literal(self.right)
+        v = cnf.new_variable()
+        cnf.clauses.extend([[-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b]])
+        return v
+
+    def source(self, atom):
+        return (f"(bool({self.left.source(atom)})"
+                f" == bool({self.right.source(atom)}))")
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
 
+class CompiledSentence():
+    """
+    A sentence compiled to two flat Python functions, generated as source
+    and built with exec. Symbol names[i] has ID i:
+
+        evaluate_bits(bits)      symbol i is bit i of the int `bits`
+        evaluate_values(values)  symbol i is values[i]
+
+    Very deep sentences can exceed the Python parser's nesting limit; they
+    fall back to walking the original sentence.
+    """
+
+    def __init__(self, sentence, symbols=None):
+        Sentence.validate(sentence)
+        if symbols is None:
+            symbols = sorted(sentence.symbols())
+        self.sentence = sentence
+        self.names = tuple(symbols)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        missing = sentence.symbols() - set(self.ids)
+        if missing:
+            raise Exception(f"variables {sorted(missing)} have no symbol ID")
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+        namespace = dict()
+        try:
+            bits = sentence.source(lambda name: f"(b >> {self.ids[name]} & 1)")
+            values = sentence.source(lambda name: f"v[{self.ids[name]}]")
+            exec(compile(
+                f"def evaluate_bits(b):\n    return bool({bits})\n"
+                f"def evaluate_values(v):\n    return bool({values})\n",
+                "<compiled sentence>", "exec"
+            ), namespace)
+        except (SyntaxError, RecursionError, MemoryError):
+            namespace["evaluate_bits"] = self.interpret_bits
+            namespace["evaluate_values"] = self.interpret_values
+        self.evaluate_bits = namespace["evaluate_bits"]
+        self.evaluate_values = namespace["evaluate_values"]
+
+    def __repr__(self):
+        return f"CompiledSentence({self.sentence})"
+
+    def interpret_bits(self, bits):
+        return self.sentence.evaluate(
+            {name: bits >> i & 1 for i, name in enumerate(self.names)}
+        )
+
+    def interpret_values(self, values):
+        return self.sentence.evaluate(dict(zip(self.names, values)))
+
+    def evaluate(self, model):
+        """Evaluates the sentence in a model given as a dict, like Sentence."""
+        return self.evaluate_values([model[name] for name in self.names])
+
+    def formula(self):
+        return self.sentence.formula()
+
+
+def uncompiled(sentence):
+    """Returns the Sentence behind a CompiledSentence, or `sentence` itself."""
+    if isinstance(sentence, CompiledSentence):
+        return sentence.sentence
+    return sentence
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form over integer literals, as used by
+    sat.Solver, together with the variable of every symbol.
+
+    Compound sentences are encoded the Tseitin way: each one gets a fresh
+    variable defined to be equivalent to it, so the clauses grow linearly
+    with the sentence. Repeated subformulas share one variable.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.variables = dict()
+        self.clauses = []
+        self.definitions = dict()
+
+    def new_variable(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def variable(self, name):
+        """Returns the variable of the symbol called `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to `sentence`, defining it if new."""
+        if sentence not in self.definitions:
+            self.definitions[sentence] = sentence.tseitin(self)
+        return self.definitions[sentence]
+
+    def add(self, sentence):
+        """Adds clauses asserting that `sentence` is true."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that answers many entailment queries with one SAT
+    solver. Clauses learned for one query or fact are kept for the next.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.flushed = 0
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def flush(self):
+        """Hands variables and clauses not yet seen by the solver over to it."""
+        while self.solver.num_vars < self.cnf.num_vars:
+            self.solver.new_variable()
+        for clause in self.cnf.clauses[self.flushed:]:
+            self.solver.add_clause(clause)
+        self.flushed = len(self.cnf.clauses)
+
+    def tell(self, sentence):
+        """Adds `sentence` to the knowledge base."""
+        sentence = uncompiled(sentence)
+        self.sentences.append(sentence)
+        self.cnf.add(sentence)
+        self.flush()
+
+    def ask(self, query):
+        """Checks if the knowledge base entails `query`."""
+        lit = self.cnf.literal(uncompiled(query))
+        self.flush()
+        return not self.solver.solve([-lit])
+
+    def ask_all(self, queries):
+        """
+        Returns a dict from each query to whether it is entailed.
+
+        One model of the knowledge base settles every query false in it;
+        only the rest need a solver call each, and every model found on the
+        way settles more of them.
+        """
+        lits = {query: self.cnf.literal(uncompiled(query)) for query in queries}
+        self.flush()
+        results = {query: True for query in lits}
+        if not self.solver.solve():
+            return results
+
+        undecided = list(lits)
+        while undecided:
+            # Queries false in the current model are not entailed
+            remaining = []
+            for query in undecided:
+                if self.solver.value(lits[query]) is False:
+                    results[query] = False
+                else:
+                    remaining.append(query)
+            if not remaining:
+                break
+            query = remaining.pop()
+            if self.solver.solve([-lits[query]]):
+                remaining.append(query)
+            undecided = remaining
+        return results
+
+
+def model_check(knowledge, query, method="sat"):
+    """
+    Checks if knowledge base entails query.
+
+    `method` picks the procedure: "sat" asks the SAT solver whether
+    knowledge ∧ ¬query is unsatisfiable, "enumerate" walks every model one
+    at a time, "parallel" splits that walk across processes, "vectorized"
+    evaluates models in NumPy batches and "bdd" compiles both to a binary
+    decision diagram (see bdd.py). Either
+    argument may be a CompiledSentence; "enumerate" then runs the compiled
+    functions over every model instead of walking the sentence trees.
+    """
+    if method == "enumerate" and (isinstance(knowledge, CompiledSentence)
+                                  or isinstance(query, CompiledSentence)):
+        return model_check_compiled(knowledge, query)
+    knowledge = uncompiled(knowledge)
+    query = uncompiled(query)
+    if method == "sat":
+        return model_check_sat(knowledge, query)
+    if method == "vectorized":
+        return model_check_vectorized(knowledge, query)
+    if method == "parallel":
+        return model_check_parallel(knowledge, query)
+    if method == "bdd":
+        from bdd import CompiledKnowledge
+        order = sorted(knowledge.symbols() | query.symbols())
+        return CompiledKnowledge(knowledge, order).ask(query)
+    if method != "enumerate":
+        raise ValueError(f"unknown model checking method {method!r}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +630,144 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_compiled(knowledge, query):
+    """
+    Checks if knowledge base entails query by running their compiled
+    functions on every model, with models as ints over one shared symbol
+    order. Sentences not compiled with that order are recompiled.
+    """
+    symbols = sorted(uncompiled(knowledge).symbols() | uncompiled(query).symbols())
+    compiled = []
+    for sentence in (knowledge, query):
+        if (not isinstance(sentence, CompiledSentence)
+                or sentence.names[:len(symbols)] != tuple(symbols)):
+            sentence = uncompiled(sentence).compile(symbols)
+        compiled.append(sentence.evaluate_bits)
+    knowledge, query = compiled
+
+    for bits in range(1 << len(symbols)):
+        if knowledge(bits) and not query(bits):
+            return False
+    return True
+
+
+# Per-process state of model_check_parallel workers
+_worker = dict()
+
+
+def _init_worker(knowledge, query, symbols, found):
+    _worker["knowledge"] = knowledge.compile(symbols).evaluate_bits
+    _worker["query"] = query.compile(symbols).evaluate_bits
+    _worker["found"] = found
+
+
+def _search_block(block):
+    """
+    Looks for a counter-model among the models in range(*block). Returns
+    its bits, or None. Gives up early once another worker found one.
+    """
+    knowledge = _worker["knowledge"]
+    query = _worker["query"]
+    found = _worker["found"]
+    start, stop = block
+    for bits in range(start, stop):
+        if knowledge(bits) and not query(bits):
+            found.set()
+            return bits
+        if not bits & 0xFFF and found.is_set():
+            return None
+    return None
+
+
+def find_counter_model(knowledge, query, processes=None, split=None):
+    """
+    Returns a model (a dict from symbol name to bool) in which knowledge is
+    true and query is false, or None if knowledge entails query.
+
+    Models are ints with symbol i at bit i. The top `split` symbols are
+    fixed per task, giving 2^split independent blocks that a pool of
+    `processes` workers searches with compiled sentences. The first
+    counter-model found stops every worker.
+    """
+    knowledge = uncompiled(knowledge)
+    query = uncompiled(query)
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    n = len(symbols)
+    processes = processes or os.cpu_count() or 1
+    if split is None:
+        # About four blocks per worker, so uneven blocks even out
+        split = (4 * processes - 1).bit_length()
+    split = min(split, n)
+
+    size = 1 << (n - split)
+    blocks = [(prefix * size, (prefix + 1) * size) for prefix in range(1 << split)]
+    found = multiprocessing.Event()
+    with multiprocessing.Pool(min(processes, len(blocks)), _init_worker,
+                              (knowledge, query, symbols, found)) as pool:
+        for bits in pool.imap_unordered(_search_block, blocks):
+            if bits is not None:
+                pool.terminate()
+                return {name: bool(bits >> i & 1) for i, name in enumerate(symbols)}
+    return None
+
+
+def model_check_parallel(knowledge, query, processes=None, split=None):
+    """
+    Checks if knowledge base entails query by enumerating models across a
+    process pool; see find_counter_model().
+    """
+    return find_counter_model(knowledge, query, processes, split) is None
+
+
+def model_check_vectorized(knowledge, query, chunk_bits=16):
+    """
+    Checks if knowledge base entails query by evaluating all 2^n models as
+    NumPy boolean columns, 2^chunk_bits models per batch.
+
+    Model m gives symbol i the value of bit i of m. Within a batch the low
+    chunk_bits symbols vary and the rest are fixed, so their columns are
+    plain np.bool_ scalars.
+    """
+    import numpy as np
+
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    low = min(len(symbols), chunk_bits)
+
+    # Columns for the symbols that vary inside a batch are the same for
+    # every batch, so build them once
+    index = np.arange(1 << low, dtype=np.uint32)
+    columns = {
+        symbol: ((index >> i) & 1).astype(bool)
+        for i, symbol in enumerate(symbols[:low])
+    }
+
+    for batch in range(1 << (len(symbols) - low)):
+        for i, symbol in enumerate(symbols[low:]):
+            columns[symbol] = np.bool_(batch >> i & 1)
+
+        # Entailment fails if some model makes knowledge true and query false
+        counter = (knowledge.evaluate_columns(columns)
+                   & ~query.evaluate_columns(columns))
+        if np.any(counter):
+            return False
+    return True
+
+
+def model_check_sat(knowledge, query):
+    """
+    Checks if knowledge base entails query, i.e. that knowledge ∧ ¬query
+    has no model, with the CDCL SAT solver.
+    """
+    cnf = knowledge.to_cnf()
+    cnf.add(Not(query))
+    solver = Solver()
+    for clause in cnf.clauses:
+        if not solver.add_clause(clause):
+            return True
+    return not solver.solve()
@@ -93,8 +93,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            results = KnowledgeBase(knowledge).ask_all(symbols)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if results[symbol]:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,300 @@
+"""
+CDCL SAT solver
+
+Clauses are lists of non-zero integers in the DIMACS style: variable v is
+the literal v and its negation is -v. The solver uses two watched literals
+per clause for unit propagation, learns a first-UIP clause from every
+conflict, jumps back non-chronologically, picks decisions by variable
+activity (VSIDS) with phase saving, and restarts on a geometric schedule.
+Clauses can be added between calls to solve(), and each call can take
+assumptions, so one solver can answer many related questions.
+"""
+
+
+class Solver():
+
+    def __init__(self):
+        self.num_vars = 0
+
+        # Per-variable state, indexed by variable (index 0 is unused)
+        self.assign = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        # Original and learned clauses, and the clauses watching a literal
+        self.clauses = []
+        self.learnts = []
+        self.watches = {}
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+        self.increment = 1.0
+        self.ok = True
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+    def new_variable(self):
+        """
+        Adds a variable and returns it.
+        """
+        self.num_vars += 1
+        v = self.num_vars
+        self.assign.append(None)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches[v] = []
+        self.watches[-v] = []
+        return v
+
+    def value(self, lit):
+        """
+        Returns True or False if `lit` is assigned, otherwise None.
+        """
+        a = self.assign[abs(lit)]
+        if a is None:
+            return None
+        return a if lit > 0 else not a
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def add_clause(self, lits):
+        """
+        Adds a clause. Returns False if the clauses are now known to be
+        unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for lit in lits:
+            while abs(lit) > self.num_vars:
+                self.new_variable()
+            value = self.value(lit)
+            if value is True or -lit in clause:
+                # Already satisfied, or a tautology
+                return True
+            if value is None and lit not in clause:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, lit, reason):
+        v = abs(lit)
+        self.assign[v] = lit > 0
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        that became false, or None.
+        """
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+
+            watchers = self.watches[false_lit]
+            kept = []
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+
+                # Make sure the false literal is clause[1]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(clause[0]) is False:
+                        kept.extend(watchers[i:])
+                        self.watches[false_lit] = kept
+                        return clause
+                    self.enqueue(clause[0], clause)
+
+            self.watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (learnt clause, level to jump back to) for a conflict, using
+        the first unique implication point. The asserting literal is first.
+        """
+        learnt = [None]
+        seen = set()
+        counter = 0
+        p = None
+        clause = conflict
+        index = len(self.trail) - 1
+        current = self.decision_level()
+
+        while True:
+            for q in clause:
+                v = abs(q)
+                if q == p or v in seen or self.level[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if self.level[v] == current:
+                    counter += 1
+                else:
+                    learnt.append(q)
+
+            # Walk back to the next literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            p = self.trail[index]
+            index -= 1
+            seen.discard(abs(p))
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reason[abs(p)]
+
+        learnt[0] = -p
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the highest-level other literal so the clause is asserting
+        best = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            for u in range(1, self.num_vars + 1):
+                self.activity[u] *= 1e-100
+            self.increment *= 1e-100
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above decision level `level`.
+        """
+        if self.decision_level() <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            v = abs(lit)
+            self.phase[v] = lit > 0
+            self.assign[v] = None
+            self.reason[v] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        best = None
+        for v in range(1, self.num_vars + 1):
+            if self.assign[v] is None and (
+                best is None or self.activity[v] > self.activity[best]
+            ):
+                best = v
+        return best
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        `assumptions` true, False otherwise. After True, model() gives a
+        satisfying assignment.
+
+        Assumptions are only decisions, so everything learned while solving
+        follows from the clauses alone and is kept for later calls.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        for lit in assumptions:
+            while abs(lit) > self.num_vars:
+                self.new_variable()
+
+        restart = 100
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.learnts.append(learnt)
+                    self.watch(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.increment /= 0.95
+                continue
+
+            if conflicts >= restart:
+                conflicts = 0
+                restart = int(restart * 1.5)
+                self.backtrack(0)
+                continue
+
+            # Decide the assumptions first, one per decision level
+            level = self.decision_level()
+            if level < len(assumptions):
+                lit = assumptions[level]
+                value = self.value(lit)
+                if value is False:
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self.enqueue(lit, None)
+                continue
+
+            v = self.pick()
+            if v is None:
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(v if self.phase[v] else -v, None)
+
+    def model(self):
+        """
+        Returns the current assignment as a list of true literals.
+        """
+        return [v if self.assign[v] else -v
+                for v in range(1, self.num_vars + 1)
+                if self.assign[v] is not None]
@@ -0,0 +1,90 @@
+"""
+Checks sample_component() against enumerate_component()
+
+Plays random moves on small boards until the AI's knowledge splits into
+components of a few cells, and fails if the mine probability that
+sample_component() estimates for any cell of a component is further than
+TOLERANCE from the exact one, worked out by enumerate_component().
+
+Usage: python check.py [--positions N] [--seed S]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+from probability import components, enumerate_component, sample_component
+
+SAMPLES = 10000
+TOLERANCE = 0.03
+
+# Largest component checked, in cells
+MAX_CELLS = 16
+
+
+def marginals(result):
+    """
+    Returns each cell's share of the configurations counted in `result`,
+    as returned by enumerate_component() or sample_component().
+    """
+    cells, ways, hits = result
+    total = sum(ways.values())
+    return {cell: sum(row[k] for row in hits.values()) / total
+            for k, cell in enumerate(cells)}
+
+
+def position(height=5, width=5, mines=5, moves=4):
+    """
+    Returns the sentences an AI holds after `moves` random safe reveals.
+    """
+    game = Minesweeper(height, width, mines)
+    ai = MinesweeperAI(height, width, mines)
+    safe = [cell_id for cell_id in range(height * width)
+            if not game.is_mine(cell_id)]
+    for cell_id in random.sample(safe, moves):
+        cell = divmod(cell_id, width)
+        ai.add_knowledge(cell, game.nearby_mines(cell_id))
+    return [(frozenset(sentence.cells), sentence.count)
+            for sentence in ai.sentences.values()]
+
+
+def check(positions=30, seed=0):
+    """
+    Returns a list of (cell, sampled, exact) for every cell whose sampled
+    probability is off by more than TOLERANCE, and the number of
+    components checked.
+    """
+    random.seed(seed)
+    failures = []
+    checked = 0
+    for _ in range(positions):
+        for group in components(position()):
+            if len(set().union(*(cells for cells, _ in group))) > MAX_CELLS:
+                continue
+            deadline = time.perf_counter() + 60
+            exact = marginals(enumerate_component(group, deadline))
+            sampled = marginals(sample_component(group, deadline, SAMPLES))
+            for cell in exact:
+                if abs(sampled[cell] - exact[cell]) > TOLERANCE:
+                    failures.append((cell, sampled[cell], exact[cell]))
+            checked += 1
+    return failures, checked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--positions", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures, checked = check(args.positions, args.seed)
+    print(f"{checked} components: {'ok' if not failures else 'FAILED'}")
+    for cell, sampled, exact in failures:
+        print(f"  {cell}: {sampled:.4f}, expected {exact:.4f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
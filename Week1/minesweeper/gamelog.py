@@ -0,0 +1,333 @@
+"""
+Replayable Minesweeper game logs
+
+A GameLog records everything needed to play a game again exactly: the
+board size, the seed it was made with, the mine layout, and every reveal
+and flag in order. Every `snapshot_every` reveals it can also store the
+AI's knowledge, so replaying to move N restores the last snapshot before
+N and only re-runs the inference after it.
+
+Logs are saved in a compact binary format:
+
+    header     b"MSLG", version byte, then height, width, mine count
+               (uint32 each), seed (uint64), whether the AI used
+               bitsets (byte) and its time limit (double), little-endian
+    layout     one bit per cell, set for mines, in cell id order
+    events     a kind byte and a uint32 each: the cell id for REVEAL,
+               FLAG and UNFLAG, or for SNAPSHOT the length of the AI
+               state that follows
+    state      the AI's next sentence id and the number of its mines,
+               safes, moves made and sentences (uint32 each), the cell ids
+               of its mines, safes and moves made (uint32 each), then for
+               every sentence its id, mine count and number of cells
+               (uint32 each) followed by its cell ids
+
+A snapshot holds only cells and counts, so a log can be read without
+trusting where it came from; the AI's index is rebuilt when it is loaded.
+
+Usage: python gamelog.py LOG [--to N] [--bench]
+"""
+
+import argparse
+import struct
+import time
+from array import array
+
+import numpy as np
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+MAGIC = b"MSLG"
+VERSION = 3
+HEADER = struct.Struct("<4sBIIIQBd")
+EVENT = struct.Struct("<BI")
+STATE = struct.Struct("<IIIII")
+SENTENCE = struct.Struct("<III")
+
+REVEAL = 0
+FLAG = 1
+UNFLAG = 2
+SNAPSHOT = 3
+
+
+class GameLog():
+    """
+    Record of one game. Call reveal() or reveal_many() after the AI has
+    taken in the revealed cells, so that a snapshot includes them.
+
+    `bitsets` and `time_limit` are the options the game's MinesweeperAI
+    was made with; replay() makes its AI the same way, so that snapshots
+    hold the kind of sentences it expects.
+    """
+
+    def __init__(self, height, width, mine_ids, seed=0, snapshot_every=100,
+                 bitsets=False, time_limit=1.0):
+        self.height = height
+        self.width = width
+        self.mine_ids = np.sort(np.asarray(mine_ids, dtype=np.int64))
+        self.seed = seed
+        self.snapshot_every = snapshot_every
+        self.bitsets = bitsets
+        self.time_limit = time_limit
+
+        # (kind, cell id) pairs, and encoded AI states by the number of
+        # events they follow
+        self.events = []
+        self.snapshots = dict()
+        self.reveals_since_snapshot = 0
+
+    @classmethod
+    def from_game(cls, game, ai=None, seed=0, snapshot_every=100):
+        """
+        Starts a log of `game`, played by `ai` if given.
+        """
+        options = dict()
+        if ai is not None:
+            options = {"bitsets": ai.bitsets, "time_limit": ai.time_limit}
+        return cls(game.height, game.width, game.mine_ids, seed,
+                   snapshot_every, **options)
+
+    def make_ai(self):
+        """
+        Returns a new MinesweeperAI made like the one that played the game.
+        """
+        return MinesweeperAI(self.height, self.width, len(self.mine_ids),
+                             time_limit=self.time_limit, bitsets=self.bitsets)
+
+    def cell_id(self, cell):
+        if isinstance(cell, tuple):
+            i, j = cell
+            return i * self.width + j
+        return int(cell)
+
+    def reveal(self, cell, ai=None):
+        """
+        Records revealing `cell`, and snapshots `ai` if it is time to.
+        """
+        self.reveal_many([cell], ai)
+
+    def reveal_many(self, cells, ai=None):
+        """
+        Records revealing `cells` in order, all in one move, such as the
+        region Minesweeper.reveal() opens, and then snapshots `ai` if it
+        is time to.
+        """
+        for cell in cells:
+            self.events.append((REVEAL, self.cell_id(cell)))
+            self.reveals_since_snapshot += 1
+        if ai is not None and self.reveals_since_snapshot >= self.snapshot_every:
+            self.snapshot(ai)
+
+    def flag(self, cell, flagged=True):
+        """
+        Records placing (or with flagged=False, removing) a flag.
+        """
+        self.events.append((FLAG if flagged else UNFLAG, self.cell_id(cell)))
+
+    def snapshot(self, ai):
+        """
+        Stores the AI's knowledge as of the events so far.
+        """
+        groups = [ai.mines, ai.safes, ai.moves_made]
+        parts = [STATE.pack(ai.next_id, *(len(group) for group in groups),
+                            len(ai.sentences))]
+        for group in groups:
+            parts.append(array("I", map(self.cell_id, group)).tobytes())
+        for sid, sentence in ai.sentences.items():
+            cells = array("I", map(self.cell_id, sentence.cells))
+            parts.append(SENTENCE.pack(sid, sentence.count, len(cells)))
+            parts.append(cells.tobytes())
+        self.snapshots[len(self.events)] = b"".join(parts)
+        self.reveals_since_snapshot = 0
+
+    def restore(self, ai, data):
+        """
+        Loads a snapshot's state into `ai`, a new MinesweeperAI.
+        """
+        size = self.height * self.width
+
+        def cells(offset, count):
+            chunk = data[offset:offset + 4 * count]
+            if len(chunk) != 4 * count:
+                raise ValueError("snapshot is cut short")
+            ids = array("I")
+            ids.frombytes(chunk)
+            if any(cell_id >= size for cell_id in ids):
+                raise ValueError("snapshot does not fit the board")
+            return [divmod(cell_id, self.width) for cell_id in ids]
+
+        try:
+            next_id, *counts, sentences = STATE.unpack_from(data)
+            offset = STATE.size
+            groups = []
+            for count in counts:
+                groups.append(set(cells(offset, count)))
+                offset += 4 * count
+            ai.mines, ai.safes, ai.moves_made = groups
+
+            for _ in range(sentences):
+                sid, count, length = SENTENCE.unpack_from(data, offset)
+                offset += SENTENCE.size
+                members = cells(offset, length)
+                offset += 4 * length
+                if count > length:
+                    raise ValueError("sentence has more mines than cells")
+                sentence = ai.make_sentence(members, count)
+                ai.sentences[sid] = sentence
+                ai.keys[sentence.key()] = sid
+                for cell in sentence.cells:
+                    ai.index.setdefault(cell, set()).add(sid)
+        except struct.error:
+            raise ValueError("snapshot is cut short")
+        ai.next_id = next_id
+
+    def game(self):
+        """
+        Returns a new Minesweeper game with the logged mine layout.
+        """
+        return Minesweeper(self.height, self.width, mine_ids=self.mine_ids)
+
+    def replay(self, n=None, ai=True, **options):
+        """
+        Replays the first `n` events (all of them by default). Returns
+        (game, ai, revealed, flags): the game, an AI that has taken in
+        every safe reveal, and the sets of revealed and flagged cells.
+
+        With ai=False no AI is built and the second item is None. Other
+        keyword arguments are passed on to MinesweeperAI, overriding the
+        logged options; snapshots are only used if `bitsets` is unchanged.
+        """
+        if n is None:
+            n = len(self.events)
+        game = self.game()
+
+        revealed = set()
+        flags = set()
+        for kind, cell_id in self.events[:n]:
+            cell = divmod(cell_id, self.width)
+            if kind == REVEAL:
+                revealed.add(cell)
+            elif kind == FLAG:
+                flags.add(cell)
+            elif kind == UNFLAG:
+                flags.discard(cell)
+        if not ai:
+            return game, None, revealed, flags
+
+        options = {"bitsets": self.bitsets, "time_limit": self.time_limit,
+                   **options}
+        player = MinesweeperAI(self.height, self.width, len(self.mine_ids),
+                               **options)
+        start = 0
+        if options["bitsets"] == self.bitsets:
+            start = max((k for k in self.snapshots if k <= n), default=0)
+        if start:
+            self.restore(player, self.snapshots[start])
+
+        for kind, cell_id in self.events[start:n]:
+            if kind == REVEAL and not game.is_mine(cell_id):
+                cell = divmod(cell_id, self.width)
+                player.add_knowledge(cell, game.nearby_mines(cell_id))
+        return game, player, revealed, flags
+
+    def to_bytes(self):
+        layout = np.zeros(self.height * self.width, dtype=bool)
+        layout[self.mine_ids] = True
+        parts = [
+            HEADER.pack(MAGIC, VERSION, self.height, self.width,
+                        len(self.mine_ids), self.seed, self.bitsets,
+                        self.time_limit),
+            np.packbits(layout).tobytes(),
+        ]
+        for k, (kind, cell_id) in enumerate(self.events):
+            if k in self.snapshots:
+                parts.append(EVENT.pack(SNAPSHOT, len(self.snapshots[k])))
+                parts.append(self.snapshots[k])
+            parts.append(EVENT.pack(kind, cell_id))
+        if len(self.events) in self.snapshots:
+            data = self.snapshots[len(self.events)]
+            parts.append(EVENT.pack(SNAPSHOT, len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data, snapshot_every=100):
+        (magic, version, height, width, mines, seed, bitsets,
+         time_limit) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} Minesweeper game log")
+        offset = HEADER.size
+        size = (height * width + 7) // 8
+        layout = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=size,
+                                             offset=offset))
+        offset += size
+
+        log = cls(height, width, np.flatnonzero(layout[:height * width]),
+                  seed, snapshot_every, bool(bitsets), time_limit)
+        if len(log.mine_ids) != mines:
+            raise ValueError("mine layout does not match the mine count")
+        while offset < len(data):
+            kind, value = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            if kind == SNAPSHOT:
+                log.snapshots[len(log.events)] = data[offset:offset + value]
+                offset += value
+            else:
+                log.events.append((kind, value))
+        return log
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("log")
+    parser.add_argument("--to", type=int, default=None,
+                        help="number of events to replay (default: all)")
+    parser.add_argument("--bench", action="store_true",
+                        help="re-run every reveal without snapshots and time it")
+    args = parser.parse_args()
+
+    log = GameLog.load(args.log)
+    reveals = sum(1 for kind, _ in log.events if kind == REVEAL)
+    print(f"{log.height}x{log.width}, {len(log.mine_ids)} mines, seed {log.seed}, "
+          f"{'bitset' if log.bitsets else 'set'} sentences")
+    print(f"{len(log.events)} events, {reveals} reveals, "
+          f"{len(log.snapshots)} snapshots")
+
+    tic = time.perf_counter()
+    game, ai, revealed, flags = log.replay(args.to)
+    elapsed = time.perf_counter() - tic
+    lost = any(game.is_mine(cell) for cell in revealed)
+    print(f"Replayed in {elapsed * 1000:.1f} ms: {len(revealed)} revealed, "
+          f"{len(flags)} flagged, {len(ai.mines)} mines and {len(ai.safes)} "
+          f"safes known, {len(ai.sentences)} sentences"
+          + (", lost" if lost else ""))
+
+    if args.bench:
+        # Every reveal from an empty knowledge base, slowest first
+        game = log.game()
+        ai = log.make_ai()
+        timings = []
+        for number, (kind, cell_id) in enumerate(log.events):
+            if kind != REVEAL or game.is_mine(cell_id):
+                continue
+            cell = divmod(cell_id, log.width)
+            tic = time.perf_counter()
+            ai.add_knowledge(cell, game.nearby_mines(cell_id))
+            timings.append((time.perf_counter() - tic, number, cell))
+        total = sum(timing for timing, _, _ in timings)
+        print(f"add_knowledge: {len(timings)} calls, {total * 1000:.1f} ms total")
+        for timing, number, cell in sorted(timings, reverse=True)[:5]:
+            print(f"  event {number}: {cell} took {timing * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,115 @@
 import itertools
 import random
 
+import numpy as np
+
+from probability import mine_probabilities
+
+
+def neighbour_counts(field):
+    """
+    Returns an array with the number of True cells around each cell of the
+    2D boolean array `field`, not counting the cell itself: the 3x3
+    convolution of the field, done as a sum of shifted slices.
+    """
+    height, width = field.shape
+    padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = field
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for di in range(3):
+        for dj in range(3):
+            if di != 1 or dj != 1:
+                counts += padded[di:di + height, dj:dj + width]
+    return counts
+
 
 class Minesweeper():
     """
     Minesweeper game representation
+
+    The field is a flat NumPy array indexed by cell id, i * width + j.
+    Every cell's count of nearby mines is worked out once, when the mines
+    are placed, so queries are just lookups. Cells can be given either as
+    (i, j) tuples or as ids.
+
+    `mine_ids`, if given, places the mines on those cell ids instead of at
+    random, e.g. to replay a recorded game.
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, mine_ids=None):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Pick the mine cells in one sample without replacement, seeded from
+        # `random` so that random.seed() still decides the layout
+        if mine_ids is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+            mine_ids = rng.choice(height * width, size=mines, replace=False,
+                                  shuffle=False)
+        self.mine_ids = np.asarray(mine_ids, dtype=np.int64)
+        self.mine_count = len(self.mine_ids)
+        self.field = np.zeros(height * width, dtype=bool)
+        self.field[self.mine_ids] = True
+        self.counts = neighbour_counts(self.field.reshape(height, width)).ravel()
+
+        # Built on first use, since they are slow for large boards
+        self._mines = None
+        self._board = None
 
         # At first, player has found no mines
         self.mines_found = set()
-    
+
+    @property
+    def mines(self):
+        """
+        Set of (i, j) cells holding a mine.
+        """
+        if self._mines is None:
+            self._mines = {divmod(int(cell_id), self.width)
+                           for cell_id in self.mine_ids}
+        return self._mines
+
+    @property
+    def board(self):
+        """
+        List of rows, True where a cell holds a mine.
+        """
+        if self._board is None:
+            self._board = self.field.reshape(self.height, self.width).tolist()
+        return self._board
+
     def get_board(self):
         return self.board
 
+    def cell_id(self, cell):
+        """
+        Returns the flat id of a cell given as (i, j) or as an id.
+        """
+        if isinstance(cell, tuple):
+            i, j = cell
+            return i * self.width + j
+        return cell
+
+    def cell(self, cell_id):
+        """
+        Returns the (i, j) cell with the given flat id.
+        """
+        return divmod(cell_id, self.width)
+
     def print(self):
         """
         Prints a text-based representation
         of where mines are located.
         """
-        for i in range(self.height):
+        for row in self.field.reshape(self.height, self.width):
             print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
+            print("".join("|X" if mine else "| " for mine in row) + "|")
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.field[self.cell_id(cell)])
 
     def nearby_mines(self, cell):
         """
@@ -61,24 +117,38 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        return int(self.counts[self.cell_id(cell)])
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+    def reveal(self, cell, skip=()):
+        """
+        Reveals a safe cell and returns a list of (cell, nearby mines)
+        observations. If the cell has no nearby mines, the whole region of
+        such cells around it is revealed too, with its numbered border,
+        as a player's flood fill would. Cells in `skip` (already revealed
+        or flagged) are left alone.
+        """
+        start = self.cell_id(cell)
+        width = self.width
+        counts = memoryview(self.counts)
+        seen = {start}
+        stack = [start]
+        observations = []
+        while stack:
+            cell_id = stack.pop()
+            count = counts[cell_id]
+            i, j = divmod(cell_id, width)
+            observations.append(((i, j), count))
+            if count:
+                continue
+
+            # No mines around, so every neighbour is safe to reveal
+            for ni in range(max(i - 1, 0), min(i + 2, self.height)):
+                for nj in range(max(j - 1, 0), min(j + 2, width)):
+                    other = ni * width + nj
+                    if other not in seen and (ni, nj) not in skip:
+                        seen.add(other)
+                        stack.append(other)
+        return observations
 
     def won(self):
         """
@@ -101,6 +171,9 @@ class Sentence():
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __len__(self):
+        return len(self.cells)
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -142,22 +215,197 @@ class Sentence():
         if cell in self.cells:
             self.cells.remove(cell)
 
+    def key(self):
+        """
+        Returns a hashable value identifying the sentence's content.
+        """
+        return (frozenset(self.cells), self.count)
+
+    def issubset(self, other):
+        """
+        Returns True if every cell of this sentence is in `other`.
+        """
+        return self.cells <= other.cells
+
+    def difference(self, other):
+        """
+        Returns the sentence for the cells of this sentence not in `other`,
+        given that `other` is a subset of it.
+        """
+        return Sentence(self.cells - other.cells, self.count - other.count)
+
+
+class BitSentence():
+    """
+    Sentence with its cells stored as a bitmask over flat cell ids
+    (i * width + j), for large boards. It answers the same questions as
+    Sentence, but equality, subset tests and differences are a few integer
+    operations, and a sentence is a few machine words instead of a set of
+    tuples.
+
+    The mask is kept relative to `base`, the sentence's lowest cell id,
+    so it only spans the rows the sentence touches however big the board.
+    """
+
+    __slots__ = ("base", "mask", "count", "width", "_cells")
+
+    def __init__(self, cells, count, width):
+        ids = [i * width + j for i, j in cells]
+        base = min(ids) if ids else 0
+        mask = 0
+        for cell_id in ids:
+            mask |= 1 << (cell_id - base)
+        self.base = base
+        self.mask = mask
+        self.count = count
+        self.width = width
+        self._cells = None
+
+    @classmethod
+    def from_mask(cls, base, mask, count, width):
+        sentence = cls((), count, width)
+        sentence.base = base
+        sentence.mask = mask
+        sentence.normalize()
+        return sentence
 
+    def normalize(self):
+        """
+        Moves `base` up to the lowest cell left in the mask.
+        """
+        if self.mask:
+            shift = (self.mask & -self.mask).bit_length() - 1
+            self.mask >>= shift
+            self.base += shift
+        else:
+            self.base = 0
+
+    @property
+    def cells(self):
+        """
+        Set of the sentence's (i, j) cells, decoded from the mask.
+        """
+        if self._cells is None:
+            cells = set()
+            mask = self.mask
+            while mask:
+                low = mask & -mask
+                cells.add(divmod(self.base + low.bit_length() - 1, self.width))
+                mask ^= low
+            self._cells = cells
+        return self._cells
+
+    def __eq__(self, other):
+        return self.key() == other.key()
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        if self.mask and self.mask.bit_count() == self.count:
+            return set(self.cells)
+        return set()
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.mask and self.count == 0:
+            return set(self.cells)
+        return set()
+
+    def remove(self, cell):
+        """
+        Clears the bit of `cell`. Returns True if it was set.
+        """
+        offset = cell[0] * self.width + cell[1] - self.base
+        if offset < 0 or not self.mask >> offset & 1:
+            return False
+        self.mask ^= 1 << offset
+        if self._cells is not None:
+            self._cells.discard(cell)
+        if offset == 0:
+            self.normalize()
+        return True
+
+    def mark_mine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        if self.remove(cell):
+            self.count -= 1
+
+    def mark_safe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        self.remove(cell)
+
+    def key(self):
+        """
+        Returns a hashable value identifying the sentence's content.
+        """
+        return (self.base, self.mask, self.count)
+
+    def issubset(self, other):
+        """
+        Returns True if every cell of this sentence is in `other`.
+        """
+        if not self.mask:
+            return True
+        if self.base < other.base:
+            return False
+        return (self.mask << (self.base - other.base)) & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence for the cells of this sentence not in `other`,
+        given that `other` is a subset of it.
+        """
+        mask = self.mask & ~(other.mask << (other.base - self.base))
+        return BitSentence.from_mask(self.base, mask,
+                                     self.count - other.count, self.width)
 
 
 class MinesweeperAI():
     """
     Minesweeper game player
+
+    The knowledge base is indexed: `index` maps each cell to the ids of
+    the sentences that mention it, so a new fact only touches the sentences
+    it is about. Sentences whose content changed go on a worklist, and only
+    those are checked against their neighbours for subset inference.
+    Empty and duplicate sentences are dropped as soon as they appear.
+
+    With `bitsets`, sentences are BitSentences instead of Sentences. The
+    engine only uses what both provide, and creates sentences through
+    make_sentence().
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, time_limit=1.0,
+                 bitsets=False):
 
-        # Set initial height and width
+        # Set initial height and width, and the total number of mines
         self.height = height
         self.width = width
-        
+        self.mine_count = mines
+
+        # Seconds to spend working out the best guess
+        self.time_limit = time_limit
+
+        # Whether sentences store their cells as bitmasks
+        self.bitsets = bitsets
+
         # Get a board from Minesweeper class:
-        minesweeper_game = Minesweeper(height, width)
+        minesweeper_game = Minesweeper(height, width, mines)
         self.board = minesweeper_game.get_board()
 
 
@@ -166,28 +414,109 @@ class MinesweeperAI():
         self.safes = set()
         self.moves_made = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, by id, with the ids of
+        # the sentences mentioning each cell and the id of each sentence
+        # content, used to spot duplicates
+        self.sentences = dict()
+        self.index = dict()
+        self.keys = dict()
+        self.next_id = 0
+
+        # Ids of sentences to re-examine
+        self.worklist = []
+
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true.
+        """
+        return list(self.sentences.values())
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        for sid in self.index.pop(cell, ()):
+            self.update_sentence(sid, lambda sentence: sentence.mark_mine(cell))
 
-            
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        for sid in self.index.pop(cell, ()):
+            self.update_sentence(sid, lambda sentence: sentence.mark_safe(cell))
 
+    def make_sentence(self, cells, count):
+        """
+        Returns a new sentence of the kind this AI uses.
+        """
+        if self.bitsets:
+            return BitSentence(cells, count, self.width)
+        return Sentence(cells, count)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base unless it is empty or already
+        known, and queues it for inference.
+        """
+        for cell in list(sentence.cells):
+            if cell in self.mines:
+                sentence.mark_mine(cell)
+            elif cell in self.safes:
+                sentence.mark_safe(cell)
+        key = sentence.key()
+        if len(sentence) == 0 or key in self.keys:
+            return
+
+        sid = self.next_id
+        self.next_id += 1
+        self.sentences[sid] = sentence
+        self.keys[key] = sid
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(sid)
+        self.worklist.append(sid)
+
+    def remove_sentence(self, sid):
+        """
+        Removes a sentence from the knowledge base and the index.
+        """
+        sentence = self.sentences.pop(sid)
+        del self.keys[sentence.key()]
+        for cell in sentence.cells:
+            sids = self.index.get(cell)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self.index[cell]
+
+    def update_sentence(self, sid, change):
+        """
+        Applies `change` to a sentence, then drops it if it became empty or
+        a duplicate, and otherwise queues it for inference.
+        """
+        sentence = self.sentences[sid]
+        del self.keys[sentence.key()]
+        change(sentence)
+        key = sentence.key()
+        if len(sentence) == 0 or key in self.keys:
+            del self.sentences[sid]
+            for cell in sentence.cells:
+                sids = self.index.get(cell)
+                if sids is not None:
+                    sids.discard(sid)
+                    if not sids:
+                        del self.index[cell]
+            return
+        self.keys[key] = sid
+        self.worklist.append(sid)
 
     def add_knowledge(self, cell, count):
         """
@@ -204,46 +533,22 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        #1tutaj trzeba sie zastanowic
-        self.moves_made.add(cell)
-        #2
-        self.mark_safe(cell)
-        #3 write all the neighbors of that cell, create a sentence out of them and add it (be sure to implement only those who are unknown!)
-        self.check_neighbours(cell, count)
-        #4
-        self.update_sentences()
-        #5
-        new_knowledge = []
-        for s1 in self.knowledge:
-            for s2 in self.knowledge:
-                if s1 is s2:
-                    continue
-                
-                if s1 == s2:
-                    self.knowledge.remove(s2)
-
-                if s1.cells.issubset(s2.cells):
-                    new_cells = s2.cells - s1.cells
-                    new_count = s2.count - s1.count
-                    if new_cells and new_count >= 0:
-                        new_sentence = Sentence(new_cells, new_count)
-                        if new_sentence not in self.knowledge and new_sentence not in new_knowledge and any(cell in self.safes for cell in new_cells):
-                            new_knowledge.append(new_sentence)
-                            self.update_sentences()
-                elif s2.cells.issubset(s1.cells):
-                    new_cells = s1.cells - s2.cells
-                    new_count = s1.count - s2.count
-                    if new_cells and new_count >= 0:
-                        new_sentence = Sentence(new_cells, new_count)
-                        if new_sentence not in self.knowledge and new_sentence not in new_knowledge and any(cell in self.safes for cell in new_cells):
-                            new_knowledge.append(new_sentence)
-                            self.update_sentences()
-        self.update_sentences()
-        self.knowledge.extend(new_knowledge)
-        self.update_sentences()
-        # print(f'bezpieczne = {self.safes}')
-        # print(f'miny = {self.mines}')
-        # print(f'wykonane ruchy = {self.moves_made}')
+        self.add_knowledge_many([(cell, count)])
+
+    def add_knowledge_many(self, observations):
+        """
+        Like add_knowledge for each (cell, count) in `observations`, e.g.
+        a flood-filled region, but runs inference once for the batch.
+        """
+        #1 and 2
+        for cell, count in observations:
+            self.moves_made.add(cell)
+            self.mark_safe(cell)
+        #3
+        for cell, count in observations:
+            self.check_neighbours(cell, count)
+        #4 and 5
+        self.infer()
 
     def check_neighbours(self, cell, count):
         cells = set()
@@ -256,32 +561,57 @@ class MinesweeperAI():
                 if (i, j) == cell:
                     continue
 
-                # check if the cell is unknown
+                # Only cells on the board, the sentence drops known ones
                 if 0 <= i < self.height and 0 <= j < self.width:
-                    if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                        cells.add((i, j))
-                    # decrease count by 1 if the cell is a mine and exclude the cell
-                    elif (i, j) in self.mines:
-                        count -= 1
-        self.knowledge.append(Sentence(cells, count))
-
-    def update_sentences(self):
-        mines_to_mark = set()
-        safes_to_mark = set()
-
-        # Zbieranie min i bezpiecznych komórek do oznaczenia
-        for s in self.knowledge:
-            mines = s.known_mines()
-            safes = s.known_safes()
-
-            mines_to_mark.update(mines)
-            safes_to_mark.update(safes)
-
-        # Oznaczanie min i bezpiecznych komórek po zakończeniu iteracji
-        for mine in mines_to_mark:
-            self.mark_mine(mine)
-        for safe in safes_to_mark:
-            self.mark_safe(safe)
+                    cells.add((i, j))
+        self.add_sentence(self.make_sentence(cells, count))
+
+    def infer(self):
+        """
+        Works through the worklist until no sentence has anything new to
+        say: marks the cells of settled sentences, and combines each queued
+        sentence with the sentences it shares a cell with.
+        """
+        while self.worklist:
+            sid = self.worklist.pop()
+            sentence = self.sentences.get(sid)
+            if sentence is None:
+                continue
+
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                for cell in list(mines):
+                    self.mark_mine(cell)
+                for cell in list(safes):
+                    self.mark_safe(cell)
+                continue
+
+            # Only sentences sharing a cell can be subsets of each other
+            related = set()
+            for cell in sentence.cells:
+                related |= self.index.get(cell, set())
+            related.discard(sid)
+
+            for other_id in related:
+                other = self.sentences.get(other_id)
+                if other is None or sid not in self.sentences:
+                    continue
+                if sentence.issubset(other):
+                    small, big_id = sentence, other_id
+                elif other.issubset(sentence):
+                    small, big_id = other, sid
+                else:
+                    continue
+
+                # The bigger sentence is the smaller one plus the difference,
+                # so replace it by the difference
+                big = self.sentences[big_id]
+                derived = big.difference(small)
+                if derived.count < 0 or derived.count > len(derived):
+                    continue
+                self.remove_sentence(big_id)
+                self.add_sentence(derived)
 
     def make_safe_move(self):
         """
@@ -301,10 +631,30 @@ class MinesweeperAI():
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking the one least likely to be a mine given the knowledge base
+        and the number of mines left (ties broken at random).
         """
         possible_moves = [(i, j) for i in range(self.height) for j in range(self.width) if (i, j) not in self.moves_made and (i, j) not in self.mines]
-        return random.choice(possible_moves) if possible_moves else None
-      
+        if not possible_moves:
+            return None
+
+        probabilities = self.mine_probabilities()
+        lowest = min(probabilities[cell] for cell in possible_moves)
+        best = [cell for cell in possible_moves
+                if probabilities[cell] <= lowest + 1e-12]
+        return random.choice(best)
+
+    def mine_probabilities(self):
+        """
+        Returns a dict from each cell not yet chosen and not known to be a
+        mine to the probability that it is a mine.
+        """
+        cells = [(i, j) for i in range(self.height) for j in range(self.width) if (i, j) not in self.moves_made and (i, j) not in self.mines]
+        sentences = [(sentence.cells, sentence.count)
+                     for sentence in self.sentences.values()]
+        return mine_probabilities(sentences, cells,
+                                  self.mine_count - len(self.mines),
+                                  self.time_limit)
@@ -0,0 +1,303 @@
+"""
+Mine probabilities for Minesweeper guesses
+
+When no cell is known to be safe, the best guess is the unknown cell most
+likely to be safe. mine_probabilities() works that out from the AI's
+sentences and the number of mines left:
+
+    1) The frontier (cells in some sentence) is split into independent
+       components: two cells are connected if a sentence mentions both.
+    2) Each component's consistent mine configurations are enumerated by
+       backtracking, counted by how many mines they use. Results are
+       memoized by the component's sentences, which often survive from
+       one move to the next.
+    3) Components and the unconstrained interior cells are combined with
+       the global mine count: a configuration using M frontier mines
+       leaves comb(interior, mines_left - M) ways to place the rest.
+
+Components too large to enumerate before the deadline are estimated
+from random configurations instead, each weighted by how unlikely it was
+to be drawn so that the estimate is not biased towards some of them.
+"""
+
+import math
+import random
+import time
+
+# Component results by their sentences, kept between calls
+CACHE = dict()
+CACHE_SIZE = 10000
+
+
+def components(sentences):
+    """
+    Splits `sentences`, a list of (cells, count) pairs, into lists of
+    sentences whose cells are connected.
+    """
+    parent = dict()
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in sentences:
+        cells = list(cells)
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        for cell in cells[1:]:
+            parent[find(cell)] = find(cells[0])
+
+    groups = dict()
+    for sentence in sentences:
+        cells, _ = sentence
+        groups.setdefault(find(next(iter(cells))), []).append(sentence)
+    return list(groups.values())
+
+
+def solutions(constraints, cell_constraints, deadline):
+    """
+    Yields every assignment of mines (a list of 0 or 1 per cell) that
+    satisfies `constraints`, by depth-first search over the cells in
+    order. Raises TimeoutError once `deadline` passes.
+
+    The search keeps its own stack, the value tried at each depth, so
+    components of any size are searched without recursion.
+    """
+    n = len(cell_constraints)
+    need = [count for _, count in constraints]
+    left = [len(members) for members, _ in constraints]
+    tried = [-1] * n
+    assignment = [0] * n
+    steps = 0
+
+    k = 0
+    while k >= 0:
+        # Take back the value placed at this depth, if any
+        if tried[k] >= 0:
+            for c in cell_constraints[k]:
+                left[c] += 1
+                need[c] += tried[k]
+            assignment[k] = 0
+
+        tried[k] += 1
+        if tried[k] > 1:
+            tried[k] = -1
+            k -= 1
+            continue
+
+        steps += 1
+        if not steps & 0x3FF and time.perf_counter() > deadline:
+            raise TimeoutError
+
+        value = tried[k]
+        ok = True
+        for c in cell_constraints[k]:
+            left[c] -= 1
+            need[c] -= value
+            if need[c] < 0 or need[c] > left[c]:
+                ok = False
+        if not ok:
+            continue
+        assignment[k] = value
+        if k == n - 1:
+            yield assignment
+        else:
+            k += 1
+
+
+def random_solution(constraints, cell_constraints, rng=random):
+    """
+    Draws one random assignment of mines, going through the cells in
+    order and picking each cell's value at random among those its
+    constraints still allow.
+
+    Returns (assignment, weight), where `weight` is one over the chance of
+    drawing that assignment, or None if the draw reached a cell with no
+    allowed value. Weighted by `weight`, draws count every satisfying
+    assignment equally, as enumerate_component() does.
+    """
+    need = [count for _, count in constraints]
+    left = [len(members) for members, _ in constraints]
+    assignment = []
+    weight = 1
+    for members in cell_constraints:
+        allowed = []
+        for value in (0, 1):
+            if all(0 <= need[c] - value <= left[c] - 1 for c in members):
+                allowed.append(value)
+        if not allowed:
+            return None
+        value = allowed[0] if len(allowed) == 1 else rng.randrange(2)
+        weight *= len(allowed)
+        for c in members:
+            left[c] -= 1
+            need[c] -= value
+        assignment.append(value)
+    return assignment, weight
+
+
+def enumerate_component(sentences, deadline):
+    """
+    Counts the consistent mine configurations of one component.
+
+    Returns (cells, ways, hits): `ways[m]` is the number of configurations
+    with m mines, and `hits[m][k]` how many of those put a mine on
+    cells[k]. Raises TimeoutError once `deadline` passes.
+    """
+    cells, constraints, cell_constraints = prepare(sentences)
+    n = len(cells)
+    ways = dict()
+    hits = dict()
+    for assignment in solutions(constraints, cell_constraints, deadline):
+        mines = sum(assignment)
+        ways[mines] = ways.get(mines, 0) + 1
+        row = hits.setdefault(mines, [0] * n)
+        for i in range(n):
+            row[i] += assignment[i]
+    return cells, ways, hits
+
+
+def sample_component(sentences, deadline, samples=2000, rng=random):
+    """
+    Estimates what enumerate_component() would return from `samples`
+    random_solution() draws, or as many as are made before `deadline`
+    passes. Each draw adds its weight to the counts, so they are
+    enumerate_component()'s times the number of draws, on average.
+    """
+    cells, constraints, cell_constraints = prepare(sentences)
+    n = len(cells)
+    ways = dict()
+    hits = dict()
+
+    for _ in range(samples):
+        if time.perf_counter() > deadline:
+            break
+        draw = random_solution(constraints, cell_constraints, rng)
+        if draw is None:
+            continue
+        assignment, weight = draw
+        mines = sum(assignment)
+        ways[mines] = ways.get(mines, 0) + weight
+        row = hits.setdefault(mines, [0] * n)
+        for i in range(n):
+            if assignment[i]:
+                row[i] += weight
+    return cells, ways, hits
+
+
+def prepare(sentences):
+    """
+    Returns (cells, constraints, cell_constraints) for a component, with
+    cells ordered so that each constraint's cells are close together,
+    which lets backtracking reject bad branches early.
+    """
+    neighbours = dict()
+    for members, _ in sentences:
+        for cell in members:
+            neighbours.setdefault(cell, set()).update(members)
+
+    # Breadth-first order over the component
+    start = min(neighbours)
+    order = [start]
+    seen = {start}
+    for cell in order:
+        for other in sorted(neighbours[cell]):
+            if other not in seen:
+                seen.add(other)
+                order.append(other)
+
+    position = {cell: k for k, cell in enumerate(order)}
+    constraints = [([position[cell] for cell in members], count)
+                   for members, count in sentences]
+    cell_constraints = [[] for _ in order]
+    for c, (members, _) in enumerate(constraints):
+        for k in members:
+            cell_constraints[k].append(c)
+    return order, constraints, cell_constraints
+
+
+def mine_probabilities(sentences, unknown, mines_left, time_limit=1.0):
+    """
+    Returns a dict from every cell in `unknown` to its probability of being
+    a mine.
+
+    `sentences` is a list of (cells, count) pairs over unknown cells,
+    `unknown` the cells neither revealed nor known to be mines, and
+    `mines_left` the number of mines not yet known.
+    """
+    deadline = time.perf_counter() + time_limit
+    unknown = set(unknown)
+    sentences = [(frozenset(cells), count) for cells, count in sentences if cells]
+    frontier = set().union(*(cells for cells, _ in sentences))
+    interior = len(unknown - frontier)
+
+    # Each component gets an equal share of the time still left, half of
+    # it to enumerate and, if that runs out, the rest to sample
+    groups = components(sentences)
+    results = []
+    for k, group in enumerate(groups):
+        key = frozenset(group)
+        result = CACHE.get(key)
+        if result is None:
+            now = time.perf_counter()
+            share = max(deadline - now, 0) / (len(groups) - k)
+            try:
+                result = enumerate_component(group, now + share / 2)
+                if len(CACHE) >= CACHE_SIZE:
+                    CACHE.clear()
+                CACHE[key] = result
+            except TimeoutError:
+                result = sample_component(group, now + share)
+        results.append(result)
+
+    # Mine count distributions combine by convolution; prefix[k] covers the
+    # components before k and suffix[k] those from k on
+    def convolve(a, b):
+        out = dict()
+        for m1, w1 in a.items():
+            for m2, w2 in b.items():
+                if m1 + m2 <= mines_left:
+                    out[m1 + m2] = out.get(m1 + m2, 0) + w1 * w2
+        return out
+
+    prefix = [{0: 1}]
+    for _, ways, _ in results:
+        prefix.append(convolve(prefix[-1], ways))
+    suffix = [{0: 1}]
+    for _, ways, _ in reversed(results):
+        suffix.append(convolve(suffix[-1], ways))
+    suffix.reverse()
+
+    def rest(m):
+        # Ways to place the mines not on the frontier in the interior
+        if m > mines_left or mines_left - m > interior:
+            return 0
+        return math.comb(interior, mines_left - m)
+
+    total = sum(w * rest(m) for m, w in prefix[-1].items())
+    probabilities = dict()
+    if total == 0:
+        # Inconsistent knowledge; fall back to a uniform guess
+        for cell in unknown:
+            probabilities[cell] = mines_left / max(len(unknown), 1)
+        return probabilities
+
+    for k, (cells, ways, hits) in enumerate(results):
+        others = convolve(prefix[k], suffix[k + 1])
+        counts = [0] * len(cells)
+        for m, row in hits.items():
+            weight = sum(w * rest(m + o) for o, w in others.items())
+            if weight:
+                for i in range(len(cells)):
+                    counts[i] += row[i] * weight
+        for cell, count in zip(cells, counts):
+            probabilities[cell] = count / total
+
+    if interior:
+        expected = sum(w * rest(m) * (mines_left - m)
+                       for m, w in prefix[-1].items())
+        for cell in unknown - frontier:
+            probabilities[cell] = expected / total / interior
+    return probabilities
@@ -1,13 +1,19 @@
+import os
 import pygame
 import sys
 import time
 
+from gamelog import GameLog
 from minesweeper import Minesweeper, MinesweeperAI
 
 HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Directory to save a replayable log of every game to, if given:
+# python runner.py [LOGDIR]
+LOGS = sys.argv[1] if len(sys.argv) > 1 else None
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -37,9 +43,23 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+
+def start_log(game, ai):
+    """
+    Returns a log of a new game and the path to save it to, or
+    (None, None) when games are not being recorded.
+    """
+    if LOGS is None:
+        return None, None
+    os.makedirs(LOGS, exist_ok=True)
+    path = os.path.join(LOGS, f"game-{time.time_ns()}.mslg")
+    return GameLog.from_game(game, ai), path
+
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+log, log_path = start_log(game, ai)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -173,6 +193,9 @@ while True:
                         flags.remove((i, j))
                     else:
                         flags.add((i, j))
+                    if log is not None:
+                        log.flag((i, j), (i, j) in flags)
+                        log.save(log_path)
                     time.sleep(0.2)
 
     elif left == 1:
@@ -184,10 +207,14 @@ while True:
             if move is None:
                 move = ai.make_random_move()
                 if move is None:
+                    if log is not None:
+                        for cell in flags ^ ai.mines:
+                            log.flag(cell, cell in ai.mines)
+                        log.save(log_path)
                     flags = ai.mines.copy()
                     print("No moves left to make.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("No known safe moves, AI guessing the cell least likely to be a mine.")
             else:
                 print("AI making safe move.")
             time.sleep(0.2)
@@ -195,7 +222,8 @@ while True:
         # Reset game state
         elif resetButton.collidepoint(mouse):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+            log, log_path = start_log(game, ai)
             revealed = set()
             flags = set()
             lost = False
@@ -214,9 +242,16 @@ while True:
     if move:
         if game.is_mine(move):
             lost = True
+            if log is not None:
+                log.reveal(move)
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            # Reveal the whole region around cells with no nearby mines
+            observations = game.reveal(move, revealed | flags)
+            revealed.update(cell for cell, _ in observations)
+            ai.add_knowledge_many(observations)
+            if log is not None:
+                log.reveal_many((cell for cell, _ in observations), ai)
+        if log is not None:
+            log.save(log_path)
 
     pygame.display.flip()
@@ -0,0 +1,206 @@
+"""
+Headless Minesweeper simulator
+
+Plays games of Minesweeper with MinesweeperAI across a pool of worker
+processes, for every combination of the given board sizes and mine
+densities, and prints a JSON report per configuration with the win rate,
+moves per second, add_knowledge latency percentiles and how big the
+knowledge base gets as the game goes on.
+
+Usage: python simulate.py [--games N] [--boards 8x8 16x30 ...]
+                          [--densities 0.125 0.2 ...] [--processes P]
+                          [--time-limit SECONDS] [--bitsets] [--seed S]
+                          [--logs DIR]
+
+With --logs, every game is also saved to DIR as a gamelog.py log.
+The report mirrors tictactoe/selfplay.py, which measures the Tic Tac Toe
+engine the same way.
+"""
+
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from gamelog import GameLog
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Knowledge base sizes are averaged over this many stages of each game,
+# by the fraction of safe cells revealed
+STAGES = 10
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of non-empty `values` (nearest rank).
+    """
+    ordered = sorted(values)
+    return ordered[max(1, -(-len(ordered) * p // 100)) - 1]
+
+
+def play_game(number, options):
+    """
+    Plays game number `number` and returns its measurements. Runs inside
+    a worker process.
+    """
+    height, width, mines = options["height"], options["width"], options["mines"]
+    safe_cells = height * width - mines
+
+    random.seed(options["seed"] + number)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       time_limit=options["time_limit"],
+                       bitsets=options["bitsets"])
+    log = None
+    if options["logs"]:
+        log = GameLog.from_game(game, ai, seed=options["seed"] + number)
+
+    latencies = []
+    sizes = []
+    guesses = 0
+    won = False
+    tic = time.perf_counter()
+    while len(ai.moves_made) < safe_cells:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            guesses += 1
+        if move is None:
+            break
+        if game.is_mine(move):
+            if log is not None:
+                log.reveal(move)
+            break
+
+        before = time.perf_counter()
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - before)
+        if log is not None:
+            log.reveal(move, ai)
+
+        stage = min(len(ai.moves_made) * STAGES // safe_cells, STAGES - 1)
+        sizes.append((stage, len(ai.sentences)))
+    else:
+        won = True
+    elapsed = time.perf_counter() - tic
+
+    if log is not None:
+        log.save(os.path.join(options["logs"],
+                              f"{height}x{width}-{mines}-{number}.mslg"))
+    return won, guesses, elapsed, latencies, sizes
+
+
+def simulate(games=1000, height=8, width=8, mines=8, processes=None,
+             time_limit=1.0, bitsets=False, seed=0, logs=None):
+    """
+    Plays `games` games on one board configuration across `processes`
+    workers and returns the report as a dictionary.
+    """
+    if games < 1:
+        raise ValueError("games must be at least 1")
+    processes = min(processes or os.cpu_count() or 1, games)
+    options = {"height": height, "width": width, "mines": mines,
+               "time_limit": time_limit, "bitsets": bitsets, "seed": seed,
+               "logs": logs}
+    if logs:
+        os.makedirs(logs, exist_ok=True)
+
+    tic = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(functools.partial(play_game, options=options),
+                           range(games),
+                           chunksize=max(1, games // (4 * processes)))
+    elapsed = time.perf_counter() - tic
+
+    latencies = [latency for result in results for latency in result[3]]
+    sizes = [size for result in results for size in result[4]]
+    game_time = sum(result[2] for result in results)
+    moves = len(latencies)
+
+    by_stage = []
+    for stage in range(STAGES):
+        values = [size for s, size in sizes if s == stage]
+        by_stage.append(sum(values) / len(values) if values else None)
+
+    return {
+        "board": f"{height}x{width}",
+        "mines": mines,
+        "density": mines / (height * width),
+        "games": games,
+        "processes": processes,
+        "bitsets": bitsets,
+        "elapsed": elapsed,
+        "win_rate": sum(result[0] for result in results) / games,
+        "moves": moves,
+        "guesses": sum(result[1] for result in results),
+        "moves_per_sec": moves / game_time if game_time else None,
+        "add_knowledge_ms": {
+            "p50": percentile(latencies, 50) * 1000 if moves else None,
+            "p99": percentile(latencies, 99) * 1000 if moves else None,
+            "max": max(latencies) * 1000 if moves else None,
+        },
+        "kb_size": {
+            "max": max((size for _, size in sizes), default=0),
+            "by_stage": by_stage,
+        },
+    }
+
+
+def board_size(text):
+    """
+    Parses a board size written as HEIGHTxWIDTH.
+    """
+    try:
+        height, width = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid board size: {text}")
+    return height, width
+
+
+def positive(text):
+    """
+    Parses a whole number of at least 1.
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {text}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=positive, default=1000,
+                        help="games per configuration")
+    parser.add_argument("--boards", type=board_size, nargs="+",
+                        default=[(8, 8)], metavar="HxW")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.125],
+                        help="fraction of cells that are mines")
+    parser.add_argument("--processes", type=positive, default=None)
+    parser.add_argument("--time-limit", type=float, default=1.0,
+                        help="seconds the AI may spend on each guess")
+    parser.add_argument("--bitsets", action="store_true",
+                        help="store sentences as bitmasks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--logs", default=None, metavar="DIR",
+                        help="save a replayable log of every game")
+    args = parser.parse_args()
+
+    reports = []
+    for height, width in args.boards:
+        for density in args.densities:
+            mines = max(1, min(round(height * width * density),
+                               height * width - 1))
+            reports.append(simulate(args.games, height, width, mines,
+                                    args.processes, args.time_limit,
+                                    args.bitsets, args.seed, args.logs))
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
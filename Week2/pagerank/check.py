@@ -0,0 +1,61 @@
+"""
+Checks the PageRank samplers against iterate_pagerank()
+
+For every corpus given (corpus0, corpus1 and corpus2 by default), runs
+sample_pagerank() with one surfer and with many vectorized surfers, and
+fails if any page's estimate is further than TOLERANCE from the iterated
+PageRank. The vectorized run uses as many surfers as samples, so every
+surfer records a single sample after its burn-in.
+
+Usage: python check.py [corpus ...]
+"""
+
+import os
+import random
+import sys
+
+from pagerank import DAMPING, crawl, iterate_pagerank, sample_pagerank
+
+SAMPLES = 100000
+TOLERANCE = 0.01
+CORPORA = ("corpus0", "corpus1", "corpus2")
+
+
+def check(directory, seed=0):
+    """
+    Returns a list of (sampler, page, sampled, iterated) for every page
+    whose sampled PageRank is off by more than TOLERANCE.
+    """
+    corpus = crawl(directory)
+    expected = iterate_pagerank(corpus, DAMPING, epsilon=1e-10)
+    random.seed(seed)
+    samplers = {
+        "one surfer": sample_pagerank(corpus, DAMPING, SAMPLES),
+        "vectorized": sample_pagerank(corpus, DAMPING, SAMPLES, surfers=SAMPLES),
+    }
+
+    failures = []
+    for name, ranks in samplers.items():
+        for page in sorted(corpus):
+            if abs(ranks[page] - expected[page]) > TOLERANCE:
+                failures.append((name, page, ranks[page], expected[page]))
+    return failures
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    directories = sys.argv[1:] or [os.path.join(here, name) for name in CORPORA]
+
+    failed = False
+    for directory in directories:
+        failures = check(directory)
+        print(f"{os.path.basename(directory)}: "
+              f"{'ok' if not failures else 'FAILED'}")
+        for name, page, sampled, iterated in failures:
+            print(f"  {name} {page}: {sampled:.4f}, expected {iterated:.4f}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
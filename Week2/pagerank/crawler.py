@@ -0,0 +1,216 @@
+"""
+Incremental, parallel crawler for a directory of HTML pages
+
+crawl() parses the .html files of a directory in a pool of worker
+processes, each file streamed in chunks instead of read whole, with the
+links picked out of each chunk as it is read. The links found are
+kept in a cache file in the directory, together with each file's
+modification time and size, so the next crawl only parses the files that
+changed since.
+
+The cache is a compact binary file:
+
+    header     b"LNKS", version byte
+    names      uint32 count, then every page name and link target once,
+               each a uint16 byte length and UTF-8 bytes
+    manifest   uint32 count, then for every file: its name id (uint32),
+               mtime in nanoseconds and size (int64 each), its number of
+               links (uint32) and the name ids of its links (uint32 each)
+
+Links are stored as written in the file, before they are narrowed down to
+pages of the corpus, so that adding or removing a page does not require
+parsing the pages that link to it again.
+"""
+
+import multiprocessing
+import os
+import re
+import struct
+from array import array
+
+CACHE_NAME = ".links.cache"
+MAGIC = b"LNKS"
+VERSION = 1
+HEADER = struct.Struct("<4sB")
+COUNT = struct.Struct("<I")
+LENGTH = struct.Struct("<H")
+ENTRY = struct.Struct("<IqqI")
+
+# Characters read from a file at a time
+CHUNK = 1 << 16
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Text that is the start of a LINK match, but not a whole one yet
+PARTIAL_LINK = re.compile(
+    r"<(?:a(?:\s+[^>]*(?:h(?:r(?:e(?:f(?:=(?:\"[^\"]*)?)?)?)?)?)?)?)?")
+
+# Below this many files to parse, a process pool costs more than it saves
+PARALLEL_MIN = 32
+
+
+def parse_file(path):
+    """
+    Returns the list of links in the HTML file at `path`.
+
+    The file is read in chunks and each chunk is scanned for links as it
+    arrives. A link cut in two by the end of a chunk is carried over, from
+    its "<", to be found once the next chunk arrives.
+    """
+    links = []
+    carry = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                break
+            text = carry + chunk
+            last = 0
+            for match in LINK.finditer(text):
+                links.append(match.group(1))
+                last = match.end()
+
+            # Keep the text from the first "<" that could still become a link
+            cut = len(text)
+            start = text.find("<", last)
+            while start >= 0:
+                if PARTIAL_LINK.fullmatch(text, start):
+                    cut = start
+                    break
+                start = text.find("<", start + 1)
+            carry = text[cut:]
+    return links
+
+
+def parse_job(job):
+    name, path = job
+    return name, parse_file(path)
+
+
+def load_cache(path):
+    """
+    Returns the cache at `path` as a dict from file name to
+    (mtime_ns, size, links), or an empty dict if there is no usable cache.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return {}
+
+    try:
+        magic, version = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return {}
+        offset = HEADER.size
+
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        names = []
+        for _ in range(count):
+            (length,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            names.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        manifest = dict()
+        for _ in range(count):
+            name_id, mtime, size, links = ENTRY.unpack_from(data, offset)
+            offset += ENTRY.size
+            ids = array("I")
+            ids.frombytes(data[offset:offset + 4 * links])
+            offset += 4 * links
+            manifest[names[name_id]] = (mtime, size, [names[i] for i in ids])
+        return manifest
+    except (struct.error, IndexError, UnicodeDecodeError, ValueError):
+        return {}
+
+
+def save_cache(path, manifest):
+    """
+    Writes `manifest`, as returned by load_cache(), to `path`.
+    """
+    names = dict()
+
+    def name_id(name):
+        if name not in names:
+            names[name] = len(names)
+        return names[name]
+
+    entries = []
+    for filename, (mtime, size, links) in manifest.items():
+        # A link too long to store cannot name a page anyway
+        ids = array("I", (name_id(link) for link in links
+                          if len(link.encode("utf-8")) <= 0xFFFF))
+        entries.append(ENTRY.pack(name_id(filename), mtime, size, len(ids)))
+        entries.append(ids.tobytes())
+
+    parts = [HEADER.pack(MAGIC, VERSION), COUNT.pack(len(names))]
+    for name in names:
+        encoded = name.encode("utf-8")
+        parts.append(LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    parts.append(COUNT.pack(len(manifest)))
+    parts.extend(entries)
+
+    # Write a new file and move it into place, so readers never see half
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(temporary, path)
+
+
+def crawl(directory, processes=None, cache=True):
+    """
+    Parse a directory of HTML pages and check for links to other pages.
+    Return a dictionary where each key is a page, and values are
+    a set of all other pages in the corpus that are linked to by the page.
+
+    Only files that are new or whose modification time or size changed
+    since the last crawl are parsed; with cache=False every file is parsed
+    and nothing is saved.
+    """
+    cache_path = os.path.join(directory, CACHE_NAME)
+    previous = load_cache(cache_path) if cache else {}
+
+    manifest = dict()
+    todo = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".html") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            known = previous.get(entry.name)
+            if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                manifest[entry.name] = known
+            else:
+                manifest[entry.name] = (stat.st_mtime_ns, stat.st_size, None)
+                todo.append((entry.name, entry.path))
+
+    # Parse what changed, in parallel if there is enough of it
+    processes = processes or os.cpu_count() or 1
+    if processes > 1 and len(todo) >= PARALLEL_MIN:
+        with multiprocessing.Pool(processes) as pool:
+            parsed = pool.imap_unordered(
+                parse_job, todo, chunksize=max(1, len(todo) // (4 * processes)))
+            for name, links in parsed:
+                manifest[name] = manifest[name][:2] + (links,)
+    else:
+        for name, path in todo:
+            manifest[name] = manifest[name][:2] + (parse_file(path),)
+
+    if cache and (todo or len(manifest) != len(previous)):
+        try:
+            save_cache(cache_path, manifest)
+        except OSError:
+            # A read-only corpus can still be crawled, just not cached
+            pass
+
+    # Only include links to other pages in the corpus
+    return {
+        filename: set(link for link in links
+                      if link in manifest and link != filename)
+        for filename, (_, _, links) in manifest.items()
+    }
@@ -1,8 +1,11 @@
-import os
+import math
 import random
-import re
 import sys
 
+import numpy as np
+
+import crawler
+
 DAMPING = 0.85
 SAMPLES = 10000
 
@@ -27,26 +30,11 @@ def crawl(directory):
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
 
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
-
-    return pages
+    Parsing is done by crawler.crawl(), in parallel, and only for the
+    files that changed since the last crawl of the directory.
+    """
+    return crawler.crawl(directory)
 
 
 def transition_model(corpus, page, damping_factor):
@@ -79,45 +67,191 @@ def transition_model(corpus, page, damping_factor):
 
     
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, surfers=None):
     """
     Estimates PageRank values for each page by randomly sampling `n` pages, following
     the transition model for page selection.
 
     Returns a dictionary with pages as keys and their estimated PageRank as values.
     PageRank values are normalized to sum up to 1.
+
+    Rather than building the transition model's full distribution at every
+    step, each step uses its structure: with probability 1 - damping_factor
+    (or always, from a page without links) jump to a uniformly random page,
+    otherwise follow a uniformly random link. That makes every sample O(1).
+    With `surfers`, that many independent surfers walk at once using NumPy,
+    see sample_pagerank_vectorized().
     """
-    # Ensure that the number of samples `n` is positive
-    if n >= 1:
-        samples_count = 0 # Counter for the number of samples taken
-        page_visits = {} # Dictionary to count visits to each page
-        current_page = random.choice(list(corpus.keys())) # Start sampling from a random page
-        page_visits[current_page] = 1 # Initialize the first visit
-
-        # Sample `n` times based on the transition model
-        while samples_count < n:
-            samples_count += 1
-            # Get the next page's probabilities from the current page's transition model
-            pages = list(transition_model(corpus, current_page, damping_factor).keys())
-            weights = list(transition_model(corpus, current_page, damping_factor).values())
-
-            # Choose the next page based on the transition probabilities
-            current_page = random.choices(pages, weights=weights, k=1)[0]
-
-            # Update visits count for the chosen page
-            if current_page in page_visits.keys():
-                page_visits[current_page] += 1
-            else:
-                page_visits[current_page] = 1
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    if surfers:
+        return sample_pagerank_vectorized(corpus, damping_factor, n, surfers)
+
+    # Pages as indices, with each page's links as a list of indices
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    links = [[index[link] for link in corpus[page] if link in index]
+             for page in pages]
+    visits = [0] * len(pages)
+
+    # The first sample is a random page, each next one follows a transition
+    current = random.randrange(len(pages))
+    for _ in range(n):
+        visits[current] += 1
+        outgoing = links[current]
+        if outgoing and random.random() < damping_factor:
+            current = outgoing[random.randrange(len(outgoing))]
+        else:
+            current = random.randrange(len(pages))
+
+    return {page: count / n for page, count in zip(pages, visits)}
+
+
+def sample_pagerank_vectorized(corpus, damping_factor, n, surfers=10000):
+    """
+    Estimates PageRank like sample_pagerank(), but with `surfers` random
+    surfers starting on random pages and stepping together, each step a
+    handful of NumPy operations over all of them. Together they take `n`
+    samples. The generator is seeded from `random`.
+
+    The surfers walk burn_in(damping_factor) steps before any visit is
+    counted, so that however few samples each one takes, they are drawn
+    from PageRank rather than from the uniform starting pages.
+    """
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    pages, sources, targets = edges(corpus)
+    size = len(pages)
+    out_degree = np.bincount(sources, minlength=size)
+
+    # Links are listed by source page, so they already form the rows of
+    # the outgoing link matrix
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(out_degree, out=indptr[1:])
+
+    rng = np.random.default_rng(random.getrandbits(64))
+    surfers = max(1, min(surfers, n))
+    current = rng.integers(size, size=surfers)
+    visits = np.zeros(size, dtype=np.int64)
+
+    def step():
+        degree = out_degree[current]
+        follow = (degree > 0) & (rng.random(surfers) < damping_factor)
+        following = current[follow]
+        offsets = (rng.random(len(following)) * degree[follow]).astype(np.int64)
+        current[follow] = targets[indptr[following] + offsets]
+        current[~follow] = rng.integers(size, size=surfers - len(following))
+
+    for _ in range(burn_in(damping_factor)):
+        step()
+
+    taken = 0
+    while taken < n:
+        count = min(surfers, n - taken)
+        visits += np.bincount(current[:count], minlength=size)
+        taken += count
+        step()
+
+    return dict(zip(pages, (visits / n).tolist()))
+
+
+def burn_in(damping_factor, epsilon=0.01):
+    """
+    Returns how many steps a surfer takes before its page is within about
+    `epsilon` of PageRank, whatever page it started on: the distance to
+    PageRank shrinks by at least damping_factor with every step.
+    """
+    if damping_factor <= 0:
+        return 0
+    if damping_factor >= 1:
+        raise ValueError("damping_factor must be below 1")
+    return math.ceil(math.log(epsilon) / math.log(damping_factor))
 
-        # Normalize visits to probabilities
-        for page in page_visits.keys():
-            page_visits[page] /= n
 
-        return page_visits
+def edges(corpus):
+    """
+    Interns the pages of `corpus` as indices 0..N-1. Returns (pages,
+    sources, targets): every link as a pair of index arrays, ordered by
+    source page. Links to pages outside the corpus are ignored.
+    """
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+
+    sources = []
+    targets = []
+    for page, links in corpus.items():
+        i = index[page]
+        for link in links:
+            j = index.get(link)
+            if j is not None:
+                sources.append(i)
+                targets.append(j)
+    return (pages, np.array(sources, dtype=np.int64),
+            np.array(targets, dtype=np.int64))
+
+
+def link_matrix(corpus):
+    """
+    Interns the pages of `corpus` as indices 0..N-1 and builds its link
+    matrix in compressed sparse row (CSR) form, with one row per page
+    listing the pages that link to it.
+
+    Returns (pages, indptr, indices, out_degree): the links into page
+    pages[j] come from the indices indices[indptr[j]:indptr[j + 1]], and
+    out_degree[i] is the number of links out of page i. Links to pages
+    outside the corpus are ignored.
+    """
+    pages, sources, targets = edges(corpus)
+    n = len(pages)
+    out_degree = np.bincount(sources, minlength=n)
+    order = np.argsort(targets, kind="stable")
+    indices = sources[order]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=n), out=indptr[1:])
+    return pages, indptr, indices, out_degree
+
+
+def power_iteration(indptr, indices, out_degree, damping_factor,
+                    epsilon=0.001, norm="linf", max_iterations=1000):
+    """
+    Computes PageRank over the CSR link matrix from link_matrix() by power
+    iteration. Stops once the change between iterations, measured by
+    `norm` ("linf" for the largest change of any page, "l1" for the sum
+    of all changes), is below `epsilon`.
 
+    Returns the PageRank values as an array that sums to 1.
+    """
+    if norm not in ("linf", "l1"):
+        raise ValueError(f"unknown norm: {norm}")
+    n = len(out_degree)
+    dangling = out_degree == 0
+    inverse = np.zeros(n)
+    inverse[~dangling] = 1 / out_degree[~dangling]
+
+    # Rows with incoming links, and where each one starts in `indices`
+    linked = indptr[:-1] < indptr[1:]
+    starts = indptr[:-1][linked]
+
+    ranks = np.full(n, 1 / n)
+    for _ in range(max_iterations):
+        # Pages without links share their rank with every page, so their
+        # mass is added once rather than along N links each
+        share = ranks * inverse
+        base = (1 - damping_factor) / n + damping_factor * ranks[dangling].sum() / n
+        new_ranks = np.full(n, base)
+        if len(indices):
+            new_ranks[linked] += damping_factor * np.add.reduceat(
+                share[indices], starts)
+
+        delta = np.abs(new_ranks - ranks)
+        change = delta.max() if norm == "linf" else delta.sum()
+        ranks = new_ranks
+        if change < epsilon:
+            break
+    return ranks
 
-def iterate_pagerank(corpus, damping_factor):
+
+def iterate_pagerank(corpus, damping_factor, epsilon=0.001, norm="linf"):
     """
     Estimates PageRank values for each page by iteratively refining
     PageRank values until they converge.
@@ -125,42 +259,10 @@ def iterate_pagerank(corpus, damping_factor):
     Returns a dictionary with page names as keys and their estimated
     PageRank values as values, where the sum of all PageRank values is 1.
     """
-    epsilon = 0.001  # Convergence threshold
-    page_ranks = {page: 1 / len(corpus) for page in corpus}  # Initial uniform distribution of PageRank
-
-    # Continue updating PageRank values until changes are under the threshold
-    while True:
-        new_page_ranks = {} # Temporary distribution of PageRank
-        max_delta = 0  # Track the maximum change between iterations for any single page
-
-        # Calculate new PageRank for each page
-        for page in corpus:
-            pr_i = (1 - damping_factor) / len(corpus)  # Base probability for random jump to any page
-            link_sum = 0  # Sum of PageRank contributions from pages linking to the current page
-
-            # Aggregate contributions from linking pages
-            for linking_page, links in corpus.items():
-                if page in links:
-                    link_sum += damping_factor * (page_ranks[linking_page] / len(links))
-                # Handle pages with no outgoing links by redistributing their rank equally
-                elif not links:
-                    link_sum += damping_factor * (page_ranks[linking_page] / len(corpus))
-
-            # Compute new PageRank
-            new_pr = pr_i + link_sum
-            new_page_ranks[page] = new_pr
-
-            # Update max_delta if this page's change is the largest so far
-            max_delta = max(max_delta, abs(new_pr - page_ranks[page]))
-
-        # Update PageRank values to those calculated in this iteration
-        page_ranks = new_page_ranks
-
-        # Break the loop if the maximum change in PageRank values is below the threshold
-        if max_delta < epsilon:
-            break
-
-    return page_ranks
+    pages, indptr, indices, out_degree = link_matrix(corpus)
+    ranks = power_iteration(indptr, indices, out_degree, damping_factor,
+                            epsilon, norm)
+    return dict(zip(pages, ranks.tolist()))
 
 
 
@@ -0,0 +1,440 @@
+"""
+Bitboard Tic Tac Toe engine
+
+The board is kept as two 9-bit integers, one holding the cells taken by X
+and one holding the cells taken by O. Cell (i, j) is bit `3 * i + j`.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+WIN_MASKS = (
+    # rows
+    0b000000111, 0b000111000, 0b111000000,
+    # columns
+    0b001001001, 0b010010010, 0b100100100,
+    # diagonals
+    0b100010001, 0b001010100,
+)
+
+# WINNING[bits] is True when `bits` covers at least one of the win masks
+WINNING = tuple(
+    any(bits & mask == mask for mask in WIN_MASKS)
+    for bits in range(FULL + 1)
+)
+
+# The 8 rotations and reflections of the board, as maps from (i, j)
+DIHEDRAL = (
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+)
+
+# SYMMETRIES[k][cell] is where symmetry k sends `cell`, INVERSES undoes it
+SYMMETRIES = tuple(
+    tuple(3 * i + j for i, j in (f(*divmod(cell, 3)) for cell in range(9)))
+    for f in DIHEDRAL
+)
+INVERSES = tuple(
+    tuple(perm.index(cell) for cell in range(9))
+    for perm in SYMMETRIES
+)
+
+# PERMUTED[k][bits] is the bitboard `bits` under symmetry k
+PERMUTED = tuple(
+    tuple(
+        sum(1 << perm[cell] for cell in range(9) if bits >> cell & 1)
+        for bits in range(FULL + 1)
+    )
+    for perm in SYMMETRIES
+)
+
+# Transposition table from canonical position to
+# (value, bound, canonical cell). It lives for the whole process, so later
+# searches reuse earlier ones.
+TABLE = {}
+
+# Kinds of value stored in TABLE
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Static move ordering: center, then corners, then edges
+RANK = (1, 2, 1, 2, 0, 2, 1, 2, 1)
+
+# History heuristic: how often each cell caused a cutoff, weighted by depth
+HISTORY = [0] * 9
+
+stats = {"hits": 0, "misses": 0, "nodes": 0}
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitboards for a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, item in enumerate(row):
+            if item == X:
+                x |= 1 << (3 * i + j)
+            elif item == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the list-of-lists board for the (x, o) bitboards.
+    """
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            if x & bit:
+                row.append(X)
+            elif o & bit:
+                row.append(O)
+            else:
+                row.append(EMPTY)
+        board.append(row)
+    return board
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    if o.bit_count() >= x.bit_count():
+        return X
+    return O
+
+
+def actions(x, o):
+    """
+    Returns the list of empty cell indices, lowest first.
+    """
+    moves = []
+    empty = FULL & ~(x | o)
+    while empty:
+        low = empty & -empty
+        moves.append(low.bit_length() - 1)
+        empty ^= low
+    return moves
+
+
+def result(x, o, cell):
+    """
+    Returns the (x, o) bitboards after the player to move takes `cell`.
+    """
+    bit = 1 << cell
+    if not 0 <= cell < 9 or (x | o) & bit:
+        raise Exception("This action is not valid for the board!")
+    if player(x, o) == X:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return (x | o) == FULL or WINNING[x] or WINNING[o]
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def canonical(x, o):
+    """
+    Returns (key, k) where `key` is the smallest encoding of the position
+    over all 8 symmetries and `k` is the symmetry that produces it.
+    """
+    best = None
+    sym = 0
+    for k, table in enumerate(PERMUTED):
+        key = table[x] << 9 | table[o]
+        if best is None or key < best:
+            best = key
+            sym = k
+    return best, sym
+
+
+def clear_table():
+    """
+    Empties the transposition table and history, and resets statistics.
+    """
+    TABLE.clear()
+    HISTORY[:] = [0] * 9
+    for key in stats:
+        stats[key] = 0
+
+
+class Game():
+    """
+    Mutable Tic Tac Toe position that the search plays moves on in place.
+
+    Besides the two bitboards it keeps the side to move, the list of empty
+    cells and the winner up to date, so none of them has to be recomputed
+    from scratch after a move.
+    """
+
+    def __init__(self, x=0, o=0):
+        self.x = x
+        self.o = o
+        self.turn = player(x, o)
+        self.empties = actions(x, o)
+        # slots[cell] is the index of `cell` in self.empties
+        self.slots = [None] * 9
+        for i, cell in enumerate(self.empties):
+            self.slots[cell] = i
+        self.winner = winner(x, o)
+        self.moves = []
+
+    def make_move(self, cell):
+        """
+        Plays `cell` for the player to move.
+        """
+        # Swap the cell with the last empty one so removal is O(1)
+        i = self.slots[cell]
+        last = self.empties.pop()
+        if last != cell:
+            self.empties[i] = last
+            self.slots[last] = i
+        self.moves.append((cell, i, self.winner))
+
+        if self.turn == X:
+            self.x |= 1 << cell
+            if WINNING[self.x]:
+                self.winner = X
+            self.turn = O
+        else:
+            self.o |= 1 << cell
+            if WINNING[self.o]:
+                self.winner = O
+            self.turn = X
+
+    def undo_move(self):
+        """
+        Takes back the last move made with make_move().
+        """
+        cell, i, self.winner = self.moves.pop()
+        if i < len(self.empties):
+            self.slots[self.empties[i]] = len(self.empties)
+            self.empties.append(self.empties[i])
+            self.empties[i] = cell
+        else:
+            self.empties.append(cell)
+        self.slots[cell] = i
+
+        if self.turn == X:
+            self.o &= ~(1 << cell)
+            self.turn = O
+        else:
+            self.x &= ~(1 << cell)
+            self.turn = X
+
+    def terminal(self):
+        return self.winner is not None or not self.empties
+
+    def utility(self):
+        if self.winner == X:
+            return 1
+        if self.winner == O:
+            return -1
+        return 0
+
+
+def ordered_actions(game, first=None):
+    """
+    Returns the empty cells of `game` in search order: `first` if given,
+    then center, corners and edges, each group sorted by history score.
+    """
+    moves = sorted(game.empties, key=lambda cell: (RANK[cell], -HISTORY[cell]))
+    if first is not None and first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    return moves
+
+
+def minimax(x, o):
+    """
+    Returns the optimal cell index for the current player, or None if the
+    game is over.
+    """
+    if terminal(x, o):
+        return None
+    if player(x, o) == X:
+        return max_value(x, o)[1]
+    return min_value(x, o)[1]
+
+
+def probe(x, o, alpha, beta):
+    """
+    Looks the position up in the transposition table.
+
+    Returns (key, sym, alpha, beta, hit, move), where `alpha` and `beta` are
+    narrowed by any stored bound, `hit` is the stored value if it settles
+    the search, and `move` is the stored best move (or None).
+    """
+    key, sym = canonical(x, o)
+    entry = TABLE.get(key)
+    if entry is None:
+        stats["misses"] += 1
+        return key, sym, alpha, beta, None, None
+
+    stats["hits"] += 1
+    value, bound, cell = entry
+    move = INVERSES[sym][cell]
+    if bound == EXACT:
+        return key, sym, alpha, beta, value, move
+    if bound == LOWER:
+        alpha = max(alpha, value)
+    else:
+        beta = min(beta, value)
+    if alpha >= beta:
+        return key, sym, alpha, beta, value, move
+    return key, sym, alpha, beta, None, move
+
+
+def store(key, sym, value, alpha, beta, move):
+    """
+    Saves a search result, recording whether it is exact or only a bound
+    relative to the (alpha, beta) window it was searched with.
+    """
+    if value <= alpha and value > -1:
+        bound = UPPER
+    elif value >= beta and value < 1:
+        bound = LOWER
+    else:
+        bound = EXACT
+    TABLE[key] = (value, bound, SYMMETRIES[sym][move])
+
+
+def max_value(x, o, alpha=-2, beta=2):
+    """
+    Returns (value, cell) for X to move, searching with alpha-beta pruning
+    inside the (alpha, beta) window.
+    """
+    return search_max(Game(x, o), alpha, beta)
+
+
+def min_value(x, o, alpha=-2, beta=2):
+    """
+    Returns (value, cell) for O to move, searching with alpha-beta pruning
+    inside the (alpha, beta) window.
+    """
+    return search_min(Game(x, o), alpha, beta)
+
+
+def search_max(game, alpha, beta):
+    """
+    max_value() on a Game, making and taking back moves in place.
+    """
+    stats["nodes"] += 1
+    if game.terminal():
+        return game.utility(), None
+
+    key, sym, a, b, hit, first = probe(game.x, game.o, alpha, beta)
+    if hit is not None:
+        return hit, first
+
+    value = -2
+    move = None
+    for cell in ordered_actions(game, first):
+        game.make_move(cell)
+        aux = search_min(game, a, b)[0]
+        game.undo_move()
+        if aux > value:
+            value = aux
+            move = cell
+        a = max(a, value)
+        if a >= b or value == 1:
+            HISTORY[cell] += len(game.empties) ** 2
+            break
+
+    store(key, sym, value, alpha, beta, move)
+    return value, move
+
+
+def search_min(game, alpha, beta):
+    """
+    min_value() on a Game, making and taking back moves in place.
+    """
+    stats["nodes"] += 1
+    if game.terminal():
+        return game.utility(), None
+
+    key, sym, a, b, hit, first = probe(game.x, game.o, alpha, beta)
+    if hit is not None:
+        return hit, first
+
+    value = 2
+    move = None
+    for cell in ordered_actions(game, first):
+        game.make_move(cell)
+        aux = search_max(game, a, b)[0]
+        game.undo_move()
+        if aux < value:
+            value = aux
+            move = cell
+        b = min(b, value)
+        if a >= b or value == -1:
+            HISTORY[cell] += len(game.empties) ** 2
+            break
+
+    store(key, sym, value, alpha, beta, move)
+    return value, move
+
+
+def reference_value(x, o):
+    """
+    Returns the value of the position using the plain max/min search this
+    engine started from: no alpha-beta window, no move ordering and no
+    transposition table. It only counts nodes, so the other searches can be
+    measured against it.
+    """
+    stats["nodes"] += 1
+    if terminal(x, o):
+        return utility(x, o)
+
+    if player(x, o) == X:
+        value = -2
+        for cell in actions(x, o):
+            value = max(value, reference_value(x | 1 << cell, o))
+            if value == 1:
+                break
+    else:
+        value = 2
+        for cell in actions(x, o):
+            value = min(value, reference_value(x, o | 1 << cell))
+            if value == -1:
+                break
+    return value
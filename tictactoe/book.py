@@ -0,0 +1,170 @@
+"""
+Perfect-play opening book for Tic Tac Toe
+
+Run `python book.py` once to solve every position reachable from the
+empty board and write the answers to book.bin. minimax() in tictactoe.py
+then memory-maps that file on first use and reads the move straight out of
+it, falling back to the live search when the file is missing.
+
+book.bin is a 5-byte header followed by one byte for every possible board,
+indexed by the board read as a base 3 number (cell 3 * i + j is digit
+3 * i + j; 0 is empty, 1 is X, 2 is O). The high nibble of the byte is the
+game value plus one and the low nibble is the best cell. Unreachable and
+finished boards hold NO_ENTRY.
+"""
+
+import mmap
+import os
+import sys
+
+import bitboard
+
+MAGIC = b"TTTB"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+SIZE = 3 ** 9
+NO_ENTRY = 0xFF
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Powers of 3 for each cell, used to index the table
+POWERS = tuple(3 ** cell for cell in range(9))
+
+# The memory-mapped book, loaded on first use. False means we looked and
+# there is no usable book file.
+_book = None
+
+
+def index(x, o):
+    """
+    Returns the table index of the (x, o) bitboards.
+    """
+    total = 0
+    for cell in range(9):
+        if x >> cell & 1:
+            total += POWERS[cell]
+        elif o >> cell & 1:
+            total += 2 * POWERS[cell]
+    return total
+
+
+def positions():
+    """
+    Returns the set of every (x, o) position reachable from the empty board.
+    """
+    seen = set()
+    frontier = [(0, 0)]
+    while frontier:
+        x, o = frontier.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        if not bitboard.terminal(x, o):
+            for cell in bitboard.actions(x, o):
+                frontier.append(bitboard.result(x, o, cell))
+    return seen
+
+
+def solve(x, o):
+    """
+    Returns (value, cell) for a position that is not over, by live search.
+    """
+    if bitboard.player(x, o) == bitboard.X:
+        return bitboard.max_value(x, o)
+    return bitboard.min_value(x, o)
+
+
+def build(path=BOOK_PATH):
+    """
+    Solves every reachable position and writes the table to `path`.
+    Returns the number of positions stored.
+    """
+    table = bytearray([NO_ENTRY]) * SIZE
+    count = 0
+    for x, o in positions():
+        if bitboard.terminal(x, o):
+            continue
+        value, cell = solve(x, o)
+        table[index(x, o)] = (value + 1) << 4 | cell
+        count += 1
+
+    with open(path, "wb") as f:
+        f.write(HEADER)
+        f.write(table)
+    return count
+
+
+def load(path=BOOK_PATH):
+    """
+    Memory-maps the book at `path`, or returns None if it is missing or
+    was written by another version.
+    """
+    try:
+        with open(path, "rb") as f:
+            book = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(book) != len(HEADER) + SIZE or book[:len(HEADER)] != HEADER:
+        book.close()
+        return None
+    return book
+
+
+def lookup(x, o, book=None):
+    """
+    Returns (value, cell) for the position, or None if the book does not
+    have it.
+    """
+    global _book
+    if book is None:
+        if _book is None:
+            _book = load() or False
+        book = _book
+    if not book:
+        return None
+
+    entry = book[len(HEADER) + index(x, o)]
+    if entry == NO_ENTRY:
+        return None
+    return (entry >> 4) - 1, entry & 0xF
+
+
+def verify(book):
+    """
+    Checks every reachable position in `book` against the live search.
+    Returns a list of the positions where the two disagree.
+    """
+    errors = []
+    for x, o in positions():
+        entry = lookup(x, o, book)
+        if bitboard.terminal(x, o):
+            if entry is not None:
+                errors.append((x, o))
+            continue
+        if entry is None:
+            errors.append((x, o))
+            continue
+
+        # The stored value must be right, and the stored move must keep it
+        value, cell = entry
+        after = bitboard.result(x, o, cell)
+        if (value != bitboard.reference_value(x, o)
+                or value != bitboard.reference_value(*after)):
+            errors.append((x, o))
+    return errors
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else BOOK_PATH
+    count = build(path)
+    print(f"Wrote {count} positions to {path}")
+    book = load(path)
+    errors = verify(book)
+    book.close()
+    if errors:
+        sys.exit(f"{len(errors)} positions disagree with the live search")
+    print("Every position agrees with the live search")
+
+
+if __name__ == "__main__":
+    main()
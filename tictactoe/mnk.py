@@ -0,0 +1,355 @@
+"""
+m,n,k-game engine
+
+Generalizes Tic Tac Toe to an m x n board where k in a row wins, e.g.
+MNKGame(15, 15, 5) for Gomoku. An MNKGame exposes the same functions as
+the tictactoe module (initial_state, player, actions, result, winner,
+terminal, utility, minimax), so runner.py can drive either one.
+"""
+
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a won game; wins closer to the root score slightly higher
+WIN = 10 ** 9
+
+# Directions a line of k can run in: right, down, down-right, down-left
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def line_heuristic(position):
+    """
+    Default evaluation: for every window of k cells held by only one
+    player, 10 ** (stones - 1) in that player's favour. Positive is good
+    for X. The sum is maintained incrementally by Position.
+    """
+    return position.score
+
+
+def window_score(xs, os):
+    """
+    Returns the contribution of one window holding `xs` X stones and `os`
+    O stones to the line heuristic.
+    """
+    if os == 0:
+        return 10 ** xs // 10
+    if xs == 0:
+        return -(10 ** os // 10)
+    return 0
+
+
+class Position():
+    """
+    Mutable position of an m,n,k-game.
+
+    For every window of k cells it keeps how many X and O stones are in it,
+    so play() and undo() only touch the windows through the moved cell and
+    can tell right away whether the move completed a line.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.cells = [EMPTY] * (game.m * game.n)
+        self.counts = {X: [0] * len(game.windows), O: [0] * len(game.windows)}
+        self.turn = X
+        self.moves = []
+        self.winner = None
+        self.score = 0
+
+    def full(self):
+        return len(self.moves) == len(self.cells)
+
+    def play(self, cell):
+        """
+        Puts a stone for the player to move on `cell`.
+        """
+        player = self.turn
+        mine = self.counts[player]
+        theirs = self.counts[O if player == X else X]
+        xs, os = self.counts[X], self.counts[O]
+
+        self.moves.append((cell, self.winner))
+        for w in self.game.cell_windows[cell]:
+            self.score -= window_score(xs[w], os[w])
+            mine[w] += 1
+            self.score += window_score(xs[w], os[w])
+            if mine[w] == self.game.k and theirs[w] == 0:
+                self.winner = player
+
+        self.cells[cell] = player
+        self.turn = O if player == X else X
+
+    def undo(self):
+        """
+        Takes back the last move.
+        """
+        cell, winner = self.moves.pop()
+        player = self.cells[cell]
+        mine = self.counts[player]
+        xs, os = self.counts[X], self.counts[O]
+
+        for w in self.game.cell_windows[cell]:
+            self.score -= window_score(xs[w], os[w])
+            mine[w] -= 1
+            self.score += window_score(xs[w], os[w])
+
+        self.cells[cell] = EMPTY
+        self.turn = player
+        self.winner = winner
+
+
+class MNKGame():
+    """
+    m x n board, k in a row wins.
+
+    `budget` is the number of seconds minimax() may think for, and
+    `heuristic(position)` scores non-final positions from X's point of view
+    once the search runs out of depth. `radius` limits moves to empty cells
+    within that distance of a stone; by default it is off on boards of up
+    to 16 cells and 2 otherwise.
+    """
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, m=3, n=3, k=3, budget=1.0, heuristic=None, radius=None):
+        self.m = m
+        self.n = n
+        self.k = k
+        self.budget = budget
+        self.heuristic = heuristic or line_heuristic
+        if radius is None and m * n > 16:
+            radius = 2
+        self.radius = radius
+
+        # Every run of k cells that would win the game
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in DIRECTIONS:
+                    if 0 <= i + (k - 1) * di < m and 0 <= j + (k - 1) * dj < n:
+                        self.windows.append(tuple(
+                            (i + s * di) * n + j + s * dj for s in range(k)
+                        ))
+        self.cell_windows = [[] for _ in range(m * n)]
+        for w, cells in enumerate(self.windows):
+            for cell in cells:
+                self.cell_windows[cell].append(w)
+
+        # Cells within `radius` of each cell, for move generation
+        self.nearby = []
+        for i in range(m):
+            for j in range(n):
+                r = radius or 0
+                self.nearby.append([
+                    a * n + b
+                    for a in range(max(0, i - r), min(m, i + r + 1))
+                    for b in range(max(0, j - r), min(n, j + r + 1))
+                    if (a, b) != (i, j)
+                ])
+
+        self.history = [0] * (m * n)
+        self.nodes = 0
+        self.depth = 0
+        self.stop = None
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def position(self, board):
+        """
+        Returns a Position with the stones of a list-of-lists board.
+        """
+        position = Position(self)
+        for i, row in enumerate(board):
+            for j, item in enumerate(row):
+                if item != EMPTY:
+                    position.turn = item
+                    position.play(i * self.n + j)
+        position.turn = self.player(board)
+        return position
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        countx = sum(row.count(X) for row in board)
+        counto = sum(row.count(O) for row in board)
+        return X if counto >= countx else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i, row in enumerate(board)
+                for j, item in enumerate(row) if item == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise Exception("This action is not valid for the board!")
+        copied_board = [row[:] for row in board]
+        copied_board[i][j] = self.player(board)
+        return copied_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for cells in self.windows:
+            first = board[cells[0] // self.n][cells[0] % self.n]
+            if first != EMPTY and all(
+                board[cell // self.n][cell % self.n] == first for cell in cells
+            ):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner(board) is not None or not self.actions(board)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        if winner == X:
+            return 1
+        if winner == O:
+            return -1
+        return 0
+
+    def minimax(self, board, stop=None):
+        """
+        Returns the best action found for the current player within the
+        time budget, or None if the game is over. Setting the
+        threading.Event `stop` ends the search early.
+        """
+        position = self.position(board)
+        if position.winner is not None or position.full():
+            return None
+        return divmod(self.search(position, stop=stop), self.n)
+
+    def candidates(self, position, first=None):
+        """
+        Returns the cells worth trying in `position`, best guesses first.
+        """
+        if not position.moves:
+            return [(self.m // 2) * self.n + self.n // 2]
+        if self.radius is None:
+            cells = [c for c, item in enumerate(position.cells) if item == EMPTY]
+        else:
+            cells = {c for cell, _ in position.moves for c in self.nearby[cell]
+                     if position.cells[c] == EMPTY}
+        cells = sorted(cells, key=lambda c: -self.history[c])
+        if first is not None and first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells
+
+    def search(self, position, budget=None, stop=None):
+        """
+        Iterative deepening alpha-beta search from `position`. Returns the
+        best cell of the deepest search finished before the deadline or
+        before `stop` is set. The depth 1 search always runs to completion.
+        """
+        if budget is None:
+            budget = self.budget
+        deadline = time.perf_counter() + budget
+        self.stop = stop
+        base = len(position.moves)
+        empties = len(position.cells) - base
+        self.nodes = 0
+        self.depth = 0
+
+        best = None
+        for depth in range(1, empties + 1):
+            try:
+                value, move = self.root(position, depth,
+                                        deadline if depth > 1 else None, best)
+            except SearchTimeout:
+                while len(position.moves) > base:
+                    position.undo()
+                break
+            best = move
+            self.depth = depth
+            # A forced win or loss will not change with more depth
+            if abs(value) > WIN - len(position.cells):
+                break
+            if stop is not None and stop.is_set():
+                break
+        return best
+
+    def root(self, position, depth, deadline, first):
+        """
+        Searches every move at the root to `depth`. Returns (value, cell).
+        """
+        maximizing = position.turn == X
+        alpha, beta = -WIN - 1, WIN + 1
+        best_value = None
+        best_move = None
+        for cell in self.candidates(position, first):
+            position.play(cell)
+            value = self.value(position, depth - 1, alpha, beta, deadline, 1)
+            position.undo()
+            if best_value is None or (value > best_value if maximizing
+                                      else value < best_value):
+                best_value = value
+                best_move = cell
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+        return best_value, best_move
+
+    def value(self, position, depth, alpha, beta, deadline, ply):
+        """
+        Returns the alpha-beta value of `position` searched to `depth`.
+        """
+        self.nodes += 1
+        if deadline is not None and not self.nodes & 1023 and (
+                time.perf_counter() > deadline
+                or self.stop is not None and self.stop.is_set()):
+            raise SearchTimeout
+
+        if position.winner == X:
+            return WIN - ply
+        if position.winner == O:
+            return ply - WIN
+        if position.full():
+            return 0
+        if depth == 0:
+            return self.heuristic(position)
+
+        maximizing = position.turn == X
+        value = -WIN - 1 if maximizing else WIN + 1
+        for cell in self.candidates(position):
+            position.play(cell)
+            child = self.value(position, depth - 1, alpha, beta, deadline, ply + 1)
+            position.undo()
+            if maximizing:
+                value = max(value, child)
+                alpha = max(alpha, value)
+            else:
+                value = min(value, child)
+                beta = min(beta, value)
+            if alpha >= beta:
+                self.history[cell] += depth * depth
+                break
+        return value
@@ -3,6 +3,12 @@ import sys
 import time
 
 import tictactoe as ttt
+from mnk import MNKGame
+from worker import AIWorker
+
+# Usage: python runner.py [m n k] plays k in a row on an m x n board
+if len(sys.argv) == 4:
+    ttt = MNKGame(*(int(arg) for arg in sys.argv[1:]))
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,11 +21,16 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Shrink the tiles to fit larger boards
+rows, cols = len(ttt.initial_state()), len(ttt.initial_state()[0])
+tile_size = min(80, (height - 80) // rows, (width - 40) // cols)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+worker = AIWorker(ttt)
+ai_started = None
 
 while True:
 
@@ -67,13 +78,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -108,22 +118,27 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, searched in the background so the window
+        # stays responsive; show the AI as thinking for at least 0.5s
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_started is None:
+                ai_started = time.time()
+                worker.request(board)
+            move = worker.poll()
+            if move is not None and time.time() - ai_started >= 0.5:
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                ai_started = None
+
+        # Think about likely replies while the user is deciding
+        elif user == player and not game_over:
+            worker.ponder(board)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -141,6 +156,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    worker.reset()
+                    ai_started = None
 
     pygame.display.flip()
@@ -0,0 +1,172 @@
+"""
+Headless Tic Tac Toe self-play benchmark
+
+Plays games between tictactoe.minimax() and itself or a random player
+across a pool of worker processes, and prints a JSON report with games
+per second, nodes searched per move, transposition table and book hit
+rates, and move latency percentiles.
+
+Usage: python selfplay.py [--games N] [--opponent ai|random]
+                          [--processes P] [--no-book] [--cold] [--seed S]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import bitboard
+import book
+import tictactoe as ttt
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of `values` by the nearest-rank method.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def play_games(job):
+    """
+    Plays `count` games starting at game number `start` and returns the
+    raw measurements. Runs inside a worker process.
+    """
+    start, count, options = job
+    if options["no_book"]:
+        book._book = False
+
+    latencies = []
+    nodes = []
+    hits = misses = book_hits = 0
+    results = {ttt.X: 0, ttt.O: 0, "tie": 0}
+
+    for game in range(start, start + count):
+        rng = random.Random(options["seed"] + game)
+        # Against a random player the AI alternates between X and O
+        ai_player = ttt.X if game % 2 == 0 else ttt.O
+        if options["cold"]:
+            bitboard.clear_table()
+
+        board = ttt.initial_state()
+        while not ttt.terminal(board):
+            if options["opponent"] == "random" and ttt.player(board) != ai_player:
+                move = rng.choice(sorted(ttt.actions(board)))
+            else:
+                if book.lookup(*bitboard.encode(board)) is not None:
+                    book_hits += 1
+                before = dict(bitboard.stats)
+                tic = time.perf_counter()
+                move = ttt.minimax(board)
+                latencies.append(time.perf_counter() - tic)
+                nodes.append(bitboard.stats["nodes"] - before["nodes"])
+                hits += bitboard.stats["hits"] - before["hits"]
+                misses += bitboard.stats["misses"] - before["misses"]
+            board = ttt.result(board, move)
+
+        results[ttt.winner(board) or "tie"] += 1
+
+    return {
+        "latencies": latencies,
+        "nodes": nodes,
+        "hits": hits,
+        "misses": misses,
+        "book_hits": book_hits,
+        "results": results,
+    }
+
+
+def benchmark(games=1000, opponent="ai", processes=None, no_book=False,
+              cold=False, seed=0):
+    """
+    Plays `games` games across `processes` workers and returns the report
+    as a dictionary.
+    """
+    if games < 1:
+        raise ValueError("games must be at least 1")
+    processes = processes or os.cpu_count() or 1
+    options = {"opponent": opponent, "no_book": no_book, "cold": cold, "seed": seed}
+
+    # One contiguous block of games per worker
+    jobs = []
+    start = 0
+    for worker in range(processes):
+        count = games // processes + (1 if worker < games % processes else 0)
+        if count:
+            jobs.append((start, count, options))
+            start += count
+
+    tic = time.perf_counter()
+    with multiprocessing.Pool(len(jobs)) as pool:
+        parts = pool.map(play_games, jobs)
+    elapsed = time.perf_counter() - tic
+
+    latencies = [latency for part in parts for latency in part["latencies"]]
+    nodes = [count for part in parts for count in part["nodes"]]
+    hits = sum(part["hits"] for part in parts)
+    misses = sum(part["misses"] for part in parts)
+    book_hits = sum(part["book_hits"] for part in parts)
+    results = {key: sum(part["results"][key] for part in parts)
+               for key in (ttt.X, ttt.O, "tie")}
+    moves = len(latencies)
+
+    return {
+        "games": games,
+        "opponent": opponent,
+        "processes": len(jobs),
+        "book": not no_book,
+        "cold": cold,
+        "elapsed": elapsed,
+        "games_per_sec": games / elapsed if elapsed else None,
+        "ai_moves": moves,
+        "nodes_per_move": sum(nodes) / moves if moves else None,
+        "max_nodes_per_move": max(nodes) if nodes else None,
+        "table_hit_rate": hits / (hits + misses) if hits + misses else None,
+        "book_hit_rate": book_hits / moves if moves else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000 if moves else None,
+            "p99": percentile(latencies, 99) * 1000 if moves else None,
+            "mean": sum(latencies) / moves * 1000 if moves else None,
+        },
+        "results": results,
+    }
+
+
+def positive(text):
+    """
+    Parses a whole number of at least 1.
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {text}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=positive, default=1000)
+    parser.add_argument("--opponent", choices=("ai", "random"), default="ai")
+    parser.add_argument("--processes", type=positive, default=None)
+    parser.add_argument("--no-book", action="store_true",
+                        help="search every move instead of using book.bin")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the transposition table before each game")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = benchmark(args.games, args.opponent, args.processes,
+                       args.no_book, args.cold, args.seed)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 """
 Tic Tac Toe Player
+
+The functions below take and return the list-of-lists board used by
+runner.py, and delegate the actual work to the bitboard engine.
 """
 
-import math
-import copy
-from os import close
+import bitboard
+import book
 
 X = "X"
 O = "O"
@@ -24,178 +26,69 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    ##if evertyhing in board = empty, return X
-    countx = 0
-    counto = 0
-    for sublist in board:
-        for item in sublist:
-            if item == X:
-                countx += 1
-            if item == O:
-                counto += 1
-            
-    if counto >= countx:
-        return X
-    elif counto < countx:
-        return O
-    else:
-        return None
-    raise NotImplementedError
+    return bitboard.player(*bitboard.encode(board))
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    my_set = set()
-    for sublist_idx, sublist in enumerate(board):
-        for item_idx, item in enumerate(sublist):
-            if item == EMPTY:
-                my_set.add((sublist_idx, item_idx))
-    return my_set
-
-    raise NotImplementedError
+    return {divmod(cell, 3) for cell in bitboard.actions(*bitboard.encode(board))}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    if action not in actions(board):
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
         raise Exception("This action is not valid for the board!")
-    
-    copied_board = copy.deepcopy(board)
 
-    copied_board[action[0]][action[1]] = player(board)
-
-    return copied_board
-    raise NotImplementedError
+    x, o = bitboard.result(*bitboard.encode(board), 3 * i + j)
+    return bitboard.decode(x, o)
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    win_o_counter = 0
-    win_x_counter = 0
-    ## check horizontally
-    for row in board:
-        for item in row:
-            if item == O:
-                win_o_counter += 1
-            elif item == X:
-                win_x_counter += 1
-        if win_o_counter == 3:
-            return O
-        elif win_x_counter == 3:
-            return X
-    ## reset counters
-        else:
-            win_o_counter = 0
-            win_x_counter = 0
-    # check verticallly
-    for col_index in range(3):
-        column = [row[col_index] for row in board]
-        for item in column:
-            if item == O:
-                win_o_counter += 1
-            elif item == X:
-                win_x_counter += 1
-        if win_o_counter == 3:
-            return O
-        elif win_x_counter == 3:
-            return X
-        else:
-            win_x_counter = 0
-            win_o_counter = 0
-    
-    #diagonal checks
-    ##from top-left to bottom-right
-    if board[0][0] == board[1][1] == board[2][2] and board[0][0] != EMPTY:
-        return board[0][0]
-    ##right-to-left
-    if board[0][2] == board[1][1] == board[2][0] and board[0][2] != EMPTY:
-        return board[0][2]
-
-    return None
-    raise NotImplementedError
+    return bitboard.winner(*bitboard.encode(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None:
-        return True     
-    for row in board:
-        for cell in row:
-            if cell == EMPTY:
-                return False
-    return True
-    
-    raise NotImplementedError
+    return bitboard.terminal(*bitboard.encode(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
-    raise NotImplementedError
+    return bitboard.utility(*bitboard.encode(board))
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    if terminal(board):
+    x, o = bitboard.encode(board)
+    entry = book.lookup(x, o)
+    if entry is not None:
+        return divmod(entry[1], 3)
+
+    cell = bitboard.minimax(x, o)
+    if cell is None:
         return None
-    else:
-        if player(board) == X:
-            value, move = max_value(board)
-            return move
-        else:
-            value, move = min_value(board)
-            return move
+    return divmod(cell, 3)
 
 
 def max_value(board):
-    if terminal(board):
-        return utility(board), None
-
-    value = float('-inf')
-    move = None
-    for action in actions(board):
-        #specify the best value and move while considering opponents possible moves
-        aux, act = min_value(result(board, action))
-        if aux > value:
-            value = aux
-            move = action
-            if value == 1:
-                return value, move
-
-    return value, move
+    value, cell = bitboard.max_value(*bitboard.encode(board))
+    return value, None if cell is None else divmod(cell, 3)
 
 
 def min_value(board):
-    if terminal(board):
-        return utility(board), None
-
-    value = float('inf')
-    move = None
-    for action in actions(board):
-        aux, act = max_value(result(board, action))
-        if aux < value:
-            value = aux
-            move = action
-            if value == -1:
-                return value, move
-
-    return value, move
-
-
+    value, cell = bitboard.min_value(*bitboard.encode(board))
+    return value, None if cell is None else divmod(cell, 3)
@@ -0,0 +1,145 @@
+"""
+Background AI worker for runner.py
+
+Runs minimax() on a separate thread so the pygame window keeps drawing and
+handling events while the computer thinks. While the human is deciding,
+the worker ponders: it searches the positions after the human's likely
+replies, so that when one of them is played the answer is already known.
+"""
+
+import threading
+
+from mnk import MNKGame
+
+
+def key(board):
+    """
+    Returns a hashable key for a list-of-lists board.
+    """
+    return tuple(tuple(row) for row in board)
+
+
+class AIWorker():
+    """
+    Searches boards on a background thread, one at a time.
+
+    `ttt` is the tictactoe module or an MNKGame. Searches on an MNKGame are
+    interrupted when they are cancelled; other searches run to completion
+    and their results are thrown away.
+    """
+
+    def __init__(self, ttt, ponder_limit=8):
+        self.ttt = ttt
+        self.ponder_limit = ponder_limit
+
+        # Finished searches, from board key to move
+        self.results = {}
+
+        # Boards waiting to be searched, the board being searched, and the
+        # board the AI actually has to move on
+        self.queue = []
+        self.current = None
+        self.wanted = None
+        self.pondered = set()
+
+        self.cancel = threading.Event()
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @property
+    def thinking(self):
+        """
+        True while the AI has been asked for a move it does not have yet.
+        """
+        with self.condition:
+            return self.wanted is not None and self.wanted not in self.results
+
+    def request(self, board):
+        """
+        Asks for the AI's move on `board`. Does nothing if that board was
+        already requested; pondering on any other board is dropped.
+        """
+        board_key = key(board)
+        with self.condition:
+            if self.wanted == board_key:
+                return
+            self.wanted = board_key
+            self.queue = []
+            if board_key in self.results:
+                return
+            if self.current != board_key:
+                if self.current is not None:
+                    self.cancel.set()
+                self.queue.append(board)
+            self.condition.notify()
+
+    def poll(self):
+        """
+        Returns the move for the requested board if it is ready, else None.
+        """
+        with self.condition:
+            if self.wanted is None:
+                return None
+            return self.results.get(self.wanted)
+
+    def ponder(self, board):
+        """
+        Queues the positions after the human's likely replies on `board`,
+        the human's turn, for searching in the background.
+        """
+        board_key = key(board)
+        with self.condition:
+            if board_key in self.pondered:
+                return
+            self.pondered.add(board_key)
+            self.wanted = None
+            for reply in self.likely_replies(board):
+                self.queue.append(self.ttt.result(board, reply))
+            self.condition.notify()
+
+    def likely_replies(self, board):
+        """
+        Returns up to `ponder_limit` of the human's moves, likeliest first.
+        """
+        if isinstance(self.ttt, MNKGame):
+            position = self.ttt.position(board)
+            replies = [divmod(cell, self.ttt.n)
+                       for cell in self.ttt.candidates(position)]
+        else:
+            replies = sorted(self.ttt.actions(board))
+        return replies[:self.ponder_limit]
+
+    def reset(self):
+        """
+        Cancels all work and forgets every result, e.g. for a new game.
+        """
+        with self.condition:
+            self.queue = []
+            self.results = {}
+            self.pondered = set()
+            self.wanted = None
+            if self.current is not None:
+                self.cancel.set()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                board = self.queue.pop(0)
+                board_key = key(board)
+                if board_key in self.results or self.ttt.terminal(board):
+                    continue
+                self.current = board_key
+                self.cancel.clear()
+
+            if isinstance(self.ttt, MNKGame):
+                move = self.ttt.minimax(board, stop=self.cancel)
+            else:
+                move = self.ttt.minimax(board)
+
+            with self.condition:
+                if not self.cancel.is_set():
+                    self.results[board_key] = move
+                self.current = None